@@ -3,25 +3,82 @@
 Download pre-trained models for Coral and OpenVINO
 """
 import os
-import urllib.request
+import json
+import hashlib
+import urllib3
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 MODELS_DIR = Path(__file__).parent / "models"
 CORAL_DIR = MODELS_DIR / "coral"
 OPENVINO_DIR = MODELS_DIR / "openvino"
 
+# Shared connection pool so parallel downloads reuse TLS connections to GitHub
+HTTP = urllib3.PoolManager(maxsize=4)
+
 # Ensure directories exist
 CORAL_DIR.mkdir(parents=True, exist_ok=True)
 OPENVINO_DIR.mkdir(parents=True, exist_ok=True)
 
+def sha256sum(path):
+    """Compute the SHA-256 hex digest of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
 def download_file(url, dest):
-    """Download a file with progress"""
+    """
+    Download a file, revalidating an intact existing copy with a conditional GET
+
+    The ETag/Last-Modified validators of the last successful download are kept
+    in a .etag sidecar, so an unchanged model costs a 304 instead of a full
+    re-download while updated models are still picked up.
+    """
     print(f"Downloading {dest.name}...")
-    if dest.exists():
-        print(f"  {dest.name} already exists, skipping")
-        return
+    checksum_file = dest.with_name(dest.name + ".sha256")
+    validators_file = dest.with_name(dest.name + ".etag")
+
+    # Only trust an existing file if it still matches the checksum recorded
+    # when it was downloaded - this catches truncated or corrupted models
+    headers = {}
+    if dest.exists() and checksum_file.exists():
+        if sha256sum(dest) == checksum_file.read_text().strip():
+            if validators_file.exists():
+                validators = json.loads(validators_file.read_text())
+                if validators.get("etag"):
+                    headers["If-None-Match"] = validators["etag"]
+                if validators.get("last_modified"):
+                    headers["If-Modified-Since"] = validators["last_modified"]
+        else:
+            print(f"  {dest.name} failed checksum verification, re-downloading")
+
+    # Write to a .part file and rename on success so an interrupted download
+    # never leaves a truncated model in place
+    part = dest.with_name(dest.name + ".part")
+    digest = hashlib.sha256()
+    response = HTTP.request("GET", url, headers=headers, preload_content=False)
+    try:
+        if response.status == 304:
+            print(f"  {dest.name} is up-to-date")
+            return
+        if response.status != 200:
+            raise RuntimeError(f"Failed to download {url}: HTTP {response.status}")
+        with open(part, 'wb') as f:
+            for chunk in response.stream(1 << 20):
+                digest.update(chunk)
+                f.write(chunk)
+        validators = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified")
+        }
+    finally:
+        response.release_conn()
 
-    urllib.request.urlretrieve(url, dest)
+    os.replace(part, dest)
+    checksum_file.write_text(digest.hexdigest() + "\n")
+    validators_file.write_text(json.dumps(validators))
     print(f"  Downloaded to {dest}")
 
 def download_coral_models():
@@ -41,8 +98,14 @@ def download_coral_models():
             "https://github.com/google-coral/test_data/raw/master/imagenet_labels.txt",
     }
 
-    for filename, url in models.items():
-        download_file(url, CORAL_DIR / filename)
+    # Downloads are independent, so fetch them in parallel
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [
+            executor.submit(download_file, url, CORAL_DIR / filename)
+            for filename, url in models.items()
+        ]
+        for future in futures:
+            future.result()
 
 def download_openvino_models():
     """Download Intel OpenVINO models"""
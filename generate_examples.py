@@ -2,12 +2,24 @@
 """
 Generate examples for README documentation
 Tests all endpoints and saves results to examples/ folder
+
+Pass --scene-only to refresh just the /analyze_scene examples with one upload
+per image (its sections use different thresholds and options than the
+dedicated endpoints, so they can't stand in for the other examples).
 """
 import os
 import json
+import argparse
 import base64
+import io
+import hashlib
+import shutil
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from PIL import Image
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Configuration
 API_BASE = "http://localhost:8000"
@@ -22,11 +34,41 @@ TEST_IMAGES = {
     "test_vision": "/home/mark/vision-tool-server/uploads/test_vision.jpg",
 }
 
+# One keep-alive session shared by all worker threads. The pool is sized for
+# every request in flight at once so urllib3 never discards connections.
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=max(8, len(TEST_IMAGES) * 5),
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.2,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=None  # Analysis POSTs are safe to retry
+    )
+))
+
+def _save_original(image_path, output_dir, image_name):
+    """Copy the input image next to the results (kernel-side copy, no shell)"""
+    shutil.copyfile(image_path, output_dir / f"{image_name}_original.jpg")
+
 def save_base64_image(base64_str, output_path):
-    """Save a base64 encoded image to file"""
+    """Save a base64 data URI image to file, skipping it if unchanged since the last run"""
     if base64_str:
-        with open(output_path, 'wb') as f:
-            f.write(base64.b64decode(base64_str))
+        output_path = Path(output_path)
+        digest_file = output_path.with_suffix(output_path.suffix + ".sha")
+        digest = hashlib.sha256(base64_str.encode()).hexdigest()[:16]
+
+        if output_path.exists() and digest_file.exists() and digest_file.read_text() == digest:
+            print(f"  ✓ Unchanged: {output_path}")
+            return True
+
+        # Annotated images arrive as data URIs in whatever codec the server
+        # uses; re-encode to match the file extension the README links to
+        _, _, payload = base64_str.rpartition(',')
+        with Image.open(io.BytesIO(base64.b64decode(payload))) as img:
+            img.save(output_path)
+        digest_file.write_text(digest)
         print(f"  ✓ Saved: {output_path}")
         return True
     return False
@@ -40,7 +82,7 @@ def test_object_detection(image_name, image_path):
     with open(image_path, 'rb') as f:
         files = {'file': f}
         data = {'threshold': 0.4}
-        response = requests.post(f"{API_BASE}/detect_objects", files=files, data=data)
+        response = SESSION.post(f"{API_BASE}/detect_objects", files=files, data=data)
 
     if response.status_code == 200:
         result = response.json()
@@ -48,7 +90,7 @@ def test_object_detection(image_name, image_path):
         # Save original image
         output_dir = EXAMPLES_DIR / "object_detection"
         output_dir.mkdir(exist_ok=True)
-        os.system(f"cp {image_path} {output_dir}/{image_name}_original.jpg")
+        _save_original(image_path, output_dir, image_name)
 
         # Save annotated image
         if result.get('annotated_image'):
@@ -83,7 +125,7 @@ def test_classification(image_name, image_path):
     with open(image_path, 'rb') as f:
         files = {'file': f}
         data = {'top_k': 5}
-        response = requests.post(f"{API_BASE}/classify_image", files=files, data=data)
+        response = SESSION.post(f"{API_BASE}/classify_image", files=files, data=data)
 
     if response.status_code == 200:
         result = response.json()
@@ -91,7 +133,7 @@ def test_classification(image_name, image_path):
         # Save original image
         output_dir = EXAMPLES_DIR / "classification"
         output_dir.mkdir(exist_ok=True)
-        os.system(f"cp {image_path} {output_dir}/{image_name}_original.jpg")
+        _save_original(image_path, output_dir, image_name)
 
         # Save JSON response
         with open(output_dir / f"{image_name}_result.json", 'w') as f:
@@ -115,7 +157,7 @@ def test_face_detection(image_name, image_path):
     with open(image_path, 'rb') as f:
         files = {'file': f}
         data = {'threshold': 0.5}
-        response = requests.post(f"{API_BASE}/detect_faces", files=files, data=data)
+        response = SESSION.post(f"{API_BASE}/detect_faces", files=files, data=data)
 
     if response.status_code == 200:
         result = response.json()
@@ -123,7 +165,7 @@ def test_face_detection(image_name, image_path):
         # Save original image
         output_dir = EXAMPLES_DIR / "face_detection"
         output_dir.mkdir(exist_ok=True)
-        os.system(f"cp {image_path} {output_dir}/{image_name}_original.jpg")
+        _save_original(image_path, output_dir, image_name)
 
         # Save annotated image
         if result.get('annotated_image'):
@@ -156,7 +198,7 @@ def test_ocr(image_name, image_path):
     with open(image_path, 'rb') as f:
         files = {'file': f}
         data = {'languages': 'en', 'detail': True}
-        response = requests.post(f"{API_BASE}/extract_text", files=files, data=data)
+        response = SESSION.post(f"{API_BASE}/extract_text", files=files, data=data)
 
     if response.status_code == 200:
         result = response.json()
@@ -164,7 +206,7 @@ def test_ocr(image_name, image_path):
         # Save original image
         output_dir = EXAMPLES_DIR / "ocr"
         output_dir.mkdir(exist_ok=True)
-        os.system(f"cp {image_path} {output_dir}/{image_name}_original.jpg")
+        _save_original(image_path, output_dir, image_name)
 
         # Save annotated image
         if result.get('annotated_image'):
@@ -199,7 +241,7 @@ def test_scene_analysis(image_name, image_path):
     with open(image_path, 'rb') as f:
         files = {'file': f}
         data = {'include_text': True, 'include_faces': True}
-        response = requests.post(f"{API_BASE}/analyze_scene", files=files, data=data)
+        response = SESSION.post(f"{API_BASE}/analyze_scene", files=files, data=data)
 
     if response.status_code == 200:
         result = response.json()
@@ -207,7 +249,7 @@ def test_scene_analysis(image_name, image_path):
         # Save original image
         output_dir = EXAMPLES_DIR / "scene_analysis"
         output_dir.mkdir(exist_ok=True)
-        os.system(f"cp {image_path} {output_dir}/{image_name}_original.jpg")
+        _save_original(image_path, output_dir, image_name)
 
         # Save annotated image
         if result.get('annotated_image'):
@@ -236,17 +278,41 @@ def main():
     print("Vision Tool Server - Example Generation")
     print("=" * 60)
 
-    # Test each endpoint with each image
-    for image_name, image_path in TEST_IMAGES.items():
-        if not os.path.exists(image_path):
-            print(f"Warning: Image not found: {image_path}")
-            continue
-
-        test_object_detection(image_name, image_path)
-        test_classification(image_name, image_path)
-        test_face_detection(image_name, image_path)
-        test_ocr(image_name, image_path)
-        test_scene_analysis(image_name, image_path)
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--scene-only",
+        action="store_true",
+        help="Only refresh the /analyze_scene examples, leaving the other endpoints' as they are"
+    )
+    args = parser.parse_args()
+
+    if args.scene_only:
+        endpoint_tests = (test_scene_analysis,)
+    else:
+        endpoint_tests = (
+            test_object_detection,
+            test_classification,
+            test_face_detection,
+            test_ocr,
+            test_scene_analysis,
+        )
+
+    # The calls are independent, so run them concurrently instead of
+    # waiting on each round-trip in turn
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        futures = []
+        for image_name, image_path in TEST_IMAGES.items():
+            if not os.path.exists(image_path):
+                print(f"Warning: Image not found: {image_path}")
+                continue
+
+            futures.extend(
+                executor.submit(test, image_name, image_path)
+                for test in endpoint_tests
+            )
+
+        for future in futures:
+            future.result()  # Surface any exception from the worker
 
     print(f"\n{'='*60}")
     print(f"Examples saved to: {EXAMPLES_DIR}")
@@ -4,12 +4,67 @@ Integrates local vision analysis (Google Coral + Intel NCS2) into OpenWebUI chat
 Enhanced with better file handling and debugging
 """
 
-import base64
+import io
+import os
+import sys
+import asyncio
 import json
-import requests
-from typing import Optional, List, Dict, Any
+import mimetypes
+import aiohttp
+import aiofiles
+from collections import OrderedDict
+from typing import Optional, List, Dict, Any, Tuple
+from PIL import Image, ImageOps
 from pydantic import BaseModel, Field
 
+try:
+    import orjson
+    json_loads = orjson.loads  # Faster parsing of large annotated-image responses
+except ImportError:
+    json_loads = json.loads
+
+
+# Number of recently uploaded images kept in memory for follow-up tool calls
+IMAGE_CACHE_SIZE = 8
+
+# Fallback __files__ keys holding the file location (OpenWebUI sometimes only gives the file ID)
+FILE_PATH_KEYS = ('url', 'filepath', 'file_path', 'id')
+
+
+def downscale_image(image_data: bytes, max_edge: int) -> Optional[Tuple[bytes, str]]:
+    """
+    Shrink an image so its longest side is at most max_edge
+
+    Photos (JPEG sources) are re-encoded as JPEG. Everything else - screenshots,
+    scans, diagrams - stays lossless PNG so text edges survive for OCR, with any
+    transparency flattened onto white rather than the decoder's black.
+
+    Returns (image_bytes, content_type), or None when the image is already small
+    enough (or can't be parsed), in which case the original bytes should be sent.
+    """
+    try:
+        with Image.open(io.BytesIO(image_data)) as img:
+            if max(img.size) <= max_edge:
+                return None
+            is_jpeg = img.format == 'JPEG'
+            img.draft('RGB', (max_edge, max_edge))  # JPEG: decode at a reduced scale
+            img = ImageOps.exif_transpose(img)
+            if img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info):
+                img = img.convert('RGBA')
+                background = Image.new('RGBA', img.size, (255, 255, 255, 255))
+                img = Image.alpha_composite(background, img)
+            img = img.convert('RGB')
+            img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+            output = io.BytesIO()
+            if is_jpeg:
+                img.save(output, format='JPEG', quality=85)
+                return output.getvalue(), 'image/jpeg'
+            img.save(output, format='PNG', compress_level=1)
+            return output.getvalue(), 'image/png'
+    except Exception as e:
+        print(f"Warning: Could not downscale image, sending original: {e}")
+        return None
+
 
 class Tools:
     class Valves(BaseModel):
@@ -25,10 +80,16 @@ class Tools:
             default=0.5,
             description="Confidence threshold for face detection (0.0-1.0)"
         )
+        MAX_UPLOAD_EDGE: int = Field(
+            default=1536,
+            description="Downscale images larger than this (longest side, pixels) before upload; 0 disables"
+        )
 
     def __init__(self):
         self.valves = self.Valves()
         self.file_handler = True  # Tell OpenWebUI to pass files via __files__
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._image_cache: "OrderedDict[Tuple[str, int, int, int], Tuple[bytes, str]]" = OrderedDict()
 
     def _get_file_path(self, __files__: Optional[List[Any]]) -> Optional[str]:
         """Extract file path from OpenWebUI __files__ parameter"""
@@ -42,52 +103,126 @@ class Tools:
             # Simple string path
             return file_info
         elif isinstance(file_info, dict):
-            # Dictionary with various possible keys
-            return (
-                file_info.get('path') or
-                file_info.get('file', {}).get('path') if isinstance(file_info.get('file'), dict) else None or
-                file_info.get('url') or
-                file_info.get('filepath') or
-                file_info.get('file_path') or
-                file_info.get('id')  # Sometimes OpenWebUI uses file ID
-            )
+            # Dictionary with various possible keys, in order of preference
+            if file_info.get('path'):
+                return file_info['path']
+            nested = file_info.get('file')
+            if isinstance(nested, dict) and nested.get('path'):
+                return nested['path']
+            for key in FILE_PATH_KEYS:
+                value = file_info.get(key)
+                if value:
+                    return value
+            return None
         elif hasattr(file_info, 'path'):
             # Object with path attribute
             return file_info.path
 
         return None
 
-    def _encode_image_from_path(self, file_path: str) -> str:
-        """Read image file and encode as base64"""
-        with open(file_path, 'rb') as f:
-            image_data = f.read()
-        return base64.b64encode(image_data).decode('utf-8')
+    def _debug_file_info(self, __files__: Optional[List[Any]], __user__: Optional[Dict]) -> List[str]:
+        """Describe what OpenWebUI passed in, for diagnosing file upload problems"""
+        lines = [
+            f"Python: {sys.version.split()[0]}",
+            f"file_handler: {getattr(self, 'file_handler', 'NOT SET')}",
+            "\n__files__ received:",
+            f"  Type: {type(__files__)}",
+            f"  Value: {repr(__files__)}",
+        ]
 
-    def _call_vision_api(self, endpoint: str, image_path: str, **kwargs) -> dict:
+        if __files__:
+            lines.append(f"  Length: {len(__files__)}")
+            lines.append(f"  First item type: {type(__files__[0])}")
+            lines.append(f"  First item: {repr(__files__[0])[:500]}")
+            if isinstance(__files__[0], dict):
+                lines.append(f"  Keys: {list(__files__[0].keys())}")
+
+        lines.append(f"\n__user__ keys: {list(__user__.keys()) if __user__ else 'None'}")
+        lines.append(f"\nExtracted path: {self._get_file_path(__files__)}")
+        return lines
+
+    async def _ensure_session(self) -> aiohttp.ClientSession:
+        """Create the shared keep-alive HTTP session on first use"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=16,  # OpenWebUI may invoke tools concurrently
+                    keepalive_timeout=60,
+                    ttl_dns_cache=None  # Resolve the server once; re-resolved on connect errors
+                ),
+                timeout=aiohttp.ClientTimeout(total=30)
+            )
+        return self._session
+
+    async def _read_image(self, image_path: str) -> Tuple[bytes, str]:
+        """
+        Read image bytes for upload, reusing the cached copy for repeat calls on the same file
+
+        Large images are downscaled to MAX_UPLOAD_EDGE first - the server would
+        shrink them to its token budget anyway, so there's no point sending them.
+        Keyed by (path, mtime, size, max edge) so any edit to the file invalidates the entry.
+
+        Returns:
+            Tuple of (image_bytes, content_type)
+        """
+        st = os.stat(image_path)
+        max_edge = self.valves.MAX_UPLOAD_EDGE
+        key = (image_path, st.st_mtime_ns, st.st_size, max_edge)
+
+        cached = self._image_cache.get(key)
+        if cached is not None:
+            self._image_cache.move_to_end(key)
+            return cached
+
+        async with aiofiles.open(image_path, 'rb') as f:
+            image_data = await f.read()
+
+        content_type = mimetypes.guess_type(image_path)[0] or 'application/octet-stream'
+        if max_edge > 0:
+            downscaled = await asyncio.to_thread(downscale_image, image_data, max_edge)
+            if downscaled is not None:
+                image_data, content_type = downscaled
+
+        self._image_cache[key] = (image_data, content_type)
+        if len(self._image_cache) > IMAGE_CACHE_SIZE:
+            self._image_cache.popitem(last=False)
+        return image_data, content_type
+
+    async def _call_vision_api(self, endpoint: str, image_path: str, **kwargs) -> dict:
         """Call the vision server API"""
         try:
-            # Encode image to base64
-            image_base64 = self._encode_image_from_path(image_path)
-
-            # Prepare request
+            session = await self._ensure_session()
             url = f"{self.valves.VISION_SERVER_URL}/{endpoint}"
-            payload = {
-                "image_base64": image_base64,
-                **kwargs
-            }
-
-            # Make request
-            response = requests.post(url, json=payload, timeout=30)
-            response.raise_for_status()
 
-            return response.json()
+            # Send the raw image as multipart/form-data (no base64 inflation)
+            image_data, content_type = await self._read_image(image_path)
+
+            form = aiohttp.FormData()
+            form.add_field('file', image_data, filename=os.path.basename(image_path),
+                           content_type=content_type)
+            # Only text goes back to the model - skip rendering the annotated image
+            form.add_field('annotation', 'none')
+            for key, value in kwargs.items():
+                form.add_field(key, str(value))
+
+            async with session.post(url, data=form) as response:
+                response.raise_for_status()
+                return await response.json(loads=json_loads)
+        except aiohttp.ClientConnectorError as e:
+            # The server may have moved - drop the pinned address and re-resolve next call
+            if self._session is not None:
+                self._session.connector.clear_dns_cache()
+            return {
+                "success": False,
+                "error": f"Vision API error: {str(e)}"
+            }
         except Exception as e:
             return {
                 "success": False,
                 "error": f"Vision API error: {str(e)}"
             }
 
-    def detect_objects(
+    async def detect_objects(
         self,
         __user__: Optional[Dict] = None,
         __files__: Optional[List[Any]] = None,
@@ -115,7 +250,7 @@ class Tools:
             return f"Error: No image file path found. {files_debug}\n\nPlease upload an image before calling this tool."
 
         # Call vision API
-        result = self._call_vision_api(
+        result = await self._call_vision_api(
             "detect_objects",
             file_path,
             threshold=self.valves.OBJECT_DETECTION_THRESHOLD
@@ -131,19 +266,19 @@ class Tools:
         if count == 0:
             return "No objects detected in the image."
 
-        response = f"Detected {count} object(s):\n\n"
+        parts = [f"Detected {count} object(s):\n\n"]
         for i, obj in enumerate(objects, 1):
             label = obj.get('label', 'unknown')
             confidence = obj.get('confidence', 0) * 100
             bbox = obj.get('bbox', {})
-            response += f"{i}. {label} ({confidence:.1f}% confidence)\n"
+            parts.append(f"{i}. {label} ({confidence:.1f}% confidence)\n")
             if bbox:
-                response += f"   Location: x={bbox.get('xmin', 0):.0f}, y={bbox.get('ymin', 0):.0f}, "
-                response += f"width={bbox.get('width', 0):.0f}, height={bbox.get('height', 0):.0f}\n"
+                parts.append(f"   Location: x={bbox.get('xmin', 0):.0f}, y={bbox.get('ymin', 0):.0f}, ")
+                parts.append(f"width={bbox.get('width', 0):.0f}, height={bbox.get('height', 0):.0f}\n")
 
-        return response
+        return "".join(parts)
 
-    def classify_image(
+    async def classify_image(
         self,
         __user__: Optional[Dict] = None,
         __files__: Optional[List[Any]] = None,
@@ -166,7 +301,7 @@ class Tools:
             return "Error: No image provided. Please upload an image before calling this tool."
 
         # Call vision API
-        result = self._call_vision_api(
+        result = await self._call_vision_api(
             "classify_image",
             file_path,
             top_k=top_k
@@ -181,15 +316,15 @@ class Tools:
         if not predictions:
             return "No classification predictions available."
 
-        response = f"Top {len(predictions)} classification(s):\n\n"
+        parts = [f"Top {len(predictions)} classification(s):\n\n"]
         for i, pred in enumerate(predictions, 1):
             label = pred.get('label', 'unknown')
             confidence = pred.get('confidence', 0) * 100
-            response += f"{i}. {label} ({confidence:.1f}% confidence)\n"
+            parts.append(f"{i}. {label} ({confidence:.1f}% confidence)\n")
 
-        return response
+        return "".join(parts)
 
-    def extract_text(
+    async def extract_text(
         self,
         __user__: Optional[Dict] = None,
         __files__: Optional[List[Any]] = None,
@@ -212,7 +347,7 @@ class Tools:
             return "Error: No image provided. Please upload an image before calling this tool."
 
         # Call vision API
-        result = self._call_vision_api(
+        result = await self._call_vision_api(
             "extract_text",
             file_path,
             languages=languages,
@@ -229,14 +364,14 @@ class Tools:
         if not full_text:
             return "No text detected in the image."
 
-        response = f"Extracted Text:\n\n{full_text}\n"
+        parts = [f"Extracted Text:\n\n{full_text}\n"]
 
         if details:
-            response += f"\n\nDetected {len(details)} text region(s) with position information."
+            parts.append(f"\n\nDetected {len(details)} text region(s) with position information.")
 
-        return response
+        return "".join(parts)
 
-    def detect_faces(
+    async def detect_faces(
         self,
         __user__: Optional[Dict] = None,
         __files__: Optional[List[Any]] = None,
@@ -257,7 +392,7 @@ class Tools:
             return "Error: No image provided. Please upload an image before calling this tool."
 
         # Call vision API
-        result = self._call_vision_api(
+        result = await self._call_vision_api(
             "detect_faces",
             file_path,
             threshold=self.valves.FACE_DETECTION_THRESHOLD
@@ -273,16 +408,16 @@ class Tools:
         if count == 0:
             return "No faces detected in the image."
 
-        response = f"Detected {count} face(s):\n\n"
+        parts = [f"Detected {count} face(s):\n\n"]
         for i, face in enumerate(faces, 1):
             confidence = face.get('confidence', 0) * 100
             bbox = face.get('bbox', {})
-            response += f"{i}. Face ({confidence:.1f}% confidence)\n"
+            parts.append(f"{i}. Face ({confidence:.1f}% confidence)\n")
             if bbox:
-                response += f"   Location: x={bbox.get('xmin', 0):.0f}, y={bbox.get('ymin', 0):.0f}, "
-                response += f"width={bbox.get('width', 0):.0f}, height={bbox.get('height', 0):.0f}\n"
+                parts.append(f"   Location: x={bbox.get('xmin', 0):.0f}, y={bbox.get('ymin', 0):.0f}, ")
+                parts.append(f"width={bbox.get('width', 0):.0f}, height={bbox.get('height', 0):.0f}\n")
 
-        return response
+        return "".join(parts)
 
     def test_file_upload(
         self,
@@ -299,32 +434,9 @@ class Tools:
         :param __files__: Files from OpenWebUI
         :return: Debug information
         """
-        import sys
-
-        debug_info = []
-        debug_info.append(f"Python version: {sys.version}")
-        debug_info.append(f"file_handler flag: {getattr(self, 'file_handler', 'NOT SET')}")
-        debug_info.append(f"\n__files__ type: {type(__files__)}")
-        debug_info.append(f"__files__ value: {__files__}")
-
-        if __files__:
-            debug_info.append(f"__files__ length: {len(__files__)}")
-            if len(__files__) > 0:
-                debug_info.append(f"First item type: {type(__files__[0])}")
-                debug_info.append(f"First item value: {__files__[0]}")
-                if isinstance(__files__[0], dict):
-                    debug_info.append(f"First item keys: {list(__files__[0].keys())}")
-
-        debug_info.append(f"\n__user__ type: {type(__user__)}")
-        debug_info.append(f"__user__ keys: {list(__user__.keys()) if __user__ else 'None'}")
-
-        # Try to extract file path
-        file_path = self._get_file_path(__files__)
-        debug_info.append(f"\nExtracted file_path: {file_path}")
+        return "=== FILE UPLOAD DEBUG INFO ===\n\n" + "\n".join(self._debug_file_info(__files__, __user__))
 
-        return "=== FILE UPLOAD DEBUG INFO ===\n\n" + "\n".join(debug_info)
-
-    def analyze_scene(
+    async def analyze_scene(
         self,
         __user__: Optional[Dict] = None,
         __files__: Optional[List[Any]] = None,
@@ -349,39 +461,19 @@ class Tools:
         file_path = self._get_file_path(__files__)
 
         if not file_path:
-            # DETAILED DEBUG INFO
-            import sys
-            debug_lines = []
-            debug_lines.append("=== DIAGNOSTIC INFO ===\n")
-            debug_lines.append(f"Python: {sys.version.split()[0]}")
-            debug_lines.append(f"file_handler: {getattr(self, 'file_handler', 'NOT SET')}")
-            debug_lines.append(f"\n__files__ received:")
-            debug_lines.append(f"  Type: {type(__files__)}")
-            debug_lines.append(f"  Value: {repr(__files__)}")
-
-            if __files__:
-                debug_lines.append(f"  Length: {len(__files__)}")
-                if len(__files__) > 0:
-                    debug_lines.append(f"  First item type: {type(__files__[0])}")
-                    debug_lines.append(f"  First item: {repr(__files__[0])[:500]}")
-                    if isinstance(__files__[0], dict):
-                        debug_lines.append(f"  Keys: {list(__files__[0].keys())}")
-
-            if __user__:
-                debug_lines.append(f"\n__user__ keys: {list(__user__.keys())}")
-
-            debug_lines.append(f"\nExtracted path: {file_path}")
-            debug_lines.append("\n" + "="*40)
-            debug_lines.append("\nTROUBLESHOOTING:")
-            debug_lines.append("1. Make sure image is uploaded BEFORE sending message")
-            debug_lines.append("2. Image should be visible in chat")
-            debug_lines.append("3. Check if file_handler = True")
-            debug_lines.append("4. Try a different model (llama3.1, GPT-4)")
-
-            return "\n".join(debug_lines)
+            return "\n".join([
+                "=== DIAGNOSTIC INFO ===\n",
+                *self._debug_file_info(__files__, __user__),
+                "\n" + "=" * 40,
+                "\nTROUBLESHOOTING:",
+                "1. Make sure image is uploaded BEFORE sending message",
+                "2. Image should be visible in chat",
+                "3. Check if file_handler = True",
+                "4. Try a different model (llama3.1, GPT-4)",
+            ])
 
         # Call vision API
-        result = self._call_vision_api(
+        result = await self._call_vision_api(
             "analyze_scene",
             file_path,
             include_text=include_text,
@@ -399,38 +491,102 @@ class Tools:
             return f"Scene Analysis:\n\n{summary}"
 
         # Fallback to detailed breakdown if summary not available
-        response = "Scene Analysis:\n\n"
+        parts = ["Scene Analysis:\n\n"]
 
         # Classification
         classification = analysis.get('classification', {})
         if classification.get('predictions'):
-            response += "Main Classifications:\n"
+            parts.append("Main Classifications:\n")
             for pred in classification['predictions'][:3]:
                 label = pred.get('label', 'unknown')
                 conf = pred.get('confidence', 0) * 100
-                response += f"  - {label} ({conf:.1f}%)\n"
-            response += "\n"
+                parts.append(f"  - {label} ({conf:.1f}%)\n")
+            parts.append("\n")
 
         # Objects
         objects = analysis.get('objects', {})
         if objects.get('detected'):
-            response += f"Detected {len(objects['detected'])} object(s):\n"
+            parts.append(f"Detected {len(objects['detected'])} object(s):\n")
             for obj in objects['detected'][:5]:  # Top 5
                 label = obj.get('label', 'unknown')
                 conf = obj.get('confidence', 0) * 100
-                response += f"  - {label} ({conf:.1f}%)\n"
-            response += "\n"
+                parts.append(f"  - {label} ({conf:.1f}%)\n")
+            parts.append("\n")
 
         # Text
         if include_text:
             text_data = analysis.get('text', {})
             if text_data.get('full_text'):
-                response += f"Text Found: {text_data['full_text']}\n\n"
+                parts.append(f"Text Found: {text_data['full_text']}\n\n")
 
         # Faces
         if include_faces:
             faces = analysis.get('faces', {})
             if faces.get('count', 0) > 0:
-                response += f"Faces Detected: {faces['count']}\n"
+                parts.append(f"Faces Detected: {faces['count']}\n")
+
+        return "".join(parts)
 
-        return response
+    async def batch_analyze(
+        self,
+        __user__: Optional[Dict] = None,
+        __files__: Optional[List[Any]] = None,
+        __event_emitter__=None,
+        tasks: str = "objects,classification,text,faces",
+    ) -> str:
+        """
+        Run several vision analyses on an image in a single request.
+
+        Upload an image and choose any combination of analyses. The image is sent to the
+        vision server only once, which is faster than calling each tool separately.
+
+        :param __files__: List of uploaded files (images)
+        :param tasks: Comma-separated analyses to run: objects, classification, text, faces (default: all)
+        :return: Results of each requested analysis
+        """
+        file_path = self._get_file_path(__files__)
+
+        if not file_path:
+            return "Error: No image provided. Please upload an image before calling this tool."
+
+        # Call vision API
+        result = await self._call_vision_api(
+            "batch",
+            file_path,
+            tasks=tasks,
+            object_threshold=self.valves.OBJECT_DETECTION_THRESHOLD,
+            face_threshold=self.valves.FACE_DETECTION_THRESHOLD
+        )
+
+        if not result.get('success'):
+            return f"Error: {result.get('error', 'Unknown error')}"
+
+        # Format response
+        results = result.get('results', {})
+        parts = ["Batch Analysis:\n\n"]
+
+        for task, task_result in results.items():
+            if 'error' in task_result:
+                parts.append(f"{task}: Error - {task_result['error']}\n\n")
+                continue
+
+            if task == 'objects':
+                parts.append(f"Detected {task_result.get('count', 0)} object(s):\n")
+                for obj in task_result.get('objects', []):
+                    label = obj.get('label', 'unknown')
+                    conf = obj.get('confidence', 0) * 100
+                    parts.append(f"  - {label} ({conf:.1f}%)\n")
+            elif task == 'classification':
+                parts.append("Classifications:\n")
+                for pred in task_result.get('predictions', []):
+                    label = pred.get('label', 'unknown')
+                    conf = pred.get('confidence', 0) * 100
+                    parts.append(f"  - {label} ({conf:.1f}%)\n")
+            elif task == 'text':
+                text = task_result.get('text', '')
+                parts.append(f"Text Found: {text}\n" if text else "No text detected.\n")
+            elif task == 'faces':
+                parts.append(f"Faces Detected: {task_result.get('count', 0)}\n")
+            parts.append("\n")
+
+        return "".join(parts)
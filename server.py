@@ -3,29 +3,84 @@ Vision Tool Server - FastAPI server for OpenWebUI
 Provides local AI vision capabilities using Google Coral and Intel NCS2
 """
 import os
-import base64
-import tempfile
-from pathlib import Path
-from typing import Optional, List
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Body
+import mmap
+import asyncio
+import functools
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Optional, List, Tuple, Type, Literal
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel, Field, ValidationError
+import numpy as np
 import uvicorn
 
+try:
+    import pybase64 as base64  # SIMD-accelerated drop-in for the stdlib module
+except ImportError:
+    import base64
+
 # Import our vision tools
-from tools import object_detection, classification, ocr, face_detection, scene_analysis
+from tools import object_detection, classification, face_detection, scene_analysis, load_ocr_engine
+
+# EasyOCR, or RapidOCR with OCR_ENGINE=rapidocr
+ocr = load_ocr_engine()
 
 # Import image optimization utilities
 from utils import resize_with_retry, get_image_info, annotate_detections, annotate_scene
+from utils import ResultCache, image_digest, decode_image_bytes, decode_for_tokens
+from utils import CORAL_EXECUTOR, NCS2_EXECUTOR, image_media_type
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load every model at startup and create the shared worker pool for model calls"""
+    for tool in (object_detection, classification, ocr, face_detection):
+        tool.warmup()
+    app.state.pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="vision")
+    yield
+    app.state.pool.shutdown(wait=False)
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Vision Tool Server",
     description="Local AI-powered vision tools using Google Coral and Intel NCS2",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    # Rust JSON encoder for large annotated-image payloads. The analysis endpoints
+    # return ORJSONResponse themselves, which also skips FastAPI's jsonable_encoder pass
+    default_response_class=ORJSONResponse
 )
 
+# Largest image accepted (raw bytes), and the matching request body limit
+# allowing for base64 inflation plus form/JSON overhead
+MAX_UPLOAD_BYTES = 32 * 1024 * 1024
+MAX_BODY_BYTES = MAX_UPLOAD_BYTES * 4 // 3 + 64 * 1024
+
+
+class RequestSizeLimitMiddleware(BaseHTTPMiddleware):
+    """Reject oversized bodies from Content-Length before anything is read"""
+
+    async def dispatch(self, request: Request, call_next):
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > MAX_BODY_BYTES:
+            return ORJSONResponse(
+                status_code=413,
+                content={"success": False, "error": f"Request body too large (limit {MAX_UPLOAD_BYTES // (1024 * 1024)} MB image)"}
+            )
+        return await call_next(request)
+
+
+# Added before CORS so CORS wraps it and the 413 still carries the CORS headers
+# (otherwise browsers report an opaque CORS failure instead)
+app.add_middleware(RequestSizeLimitMiddleware)
+
 # Add CORS middleware to allow OpenWebUI to access the API
 app.add_middleware(
     CORSMiddleware,
@@ -35,8 +90,37 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers
 )
 
-UPLOAD_DIR = Path(__file__).parent / "uploads"
-UPLOAD_DIR.mkdir(exist_ok=True)
+class JSONGZipMiddleware(GZipMiddleware):
+    """GZip that passes /annotated/ image bytes (already WebP/PNG/JPEG) through untouched"""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith("/annotated/"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+# Compress JSON responses (detections, OCR text); level 1 keeps the CPU cost
+# small on the large base64 annotated images, which barely compress anyway
+app.add_middleware(JSONGZipMiddleware, minimum_size=1024, compresslevel=1)
+
+
+def response_size(response: dict) -> int:
+    """Approximate cached size of a response, dominated by the inline annotated image"""
+    return len(response.get('annotated_image') or '') + 4096
+
+
+# Responses keyed by image content + processed size + endpoint + options.
+# Entries can hold a multi-MB annotated image, so the total is capped in bytes.
+RESULT_CACHE = ResultCache(maxsize=128, max_bytes=64 * 1024 * 1024, sizeof=response_size)
+
+# Decoded image_path files keyed by (path, mtime, size), so calling several
+# endpoints on the same file decodes it once. Full-size arrays - keep it small.
+DECODE_CACHE = ResultCache(maxsize=4)
+
+# Annotated images returned by reference (annotation="url"), served from
+# /annotated/{id} until evicted. Kept in memory like uploads - nothing hits disk.
+ANNOTATED_IMAGES = ResultCache(maxsize=64, max_bytes=64 * 1024 * 1024, sizeof=len)
 
 
 # Request/Response models
@@ -44,6 +128,8 @@ class DetectObjectsRequest(BaseModel):
     image_path: Optional[str] = Field(None, description="Path to image file on server")
     image_base64: Optional[str] = Field(None, description="Base64 encoded image data")
     threshold: float = Field(0.4, description="Confidence threshold (0.0-1.0)")
+    annotation: Literal['base64', 'url', 'none'] = Field(
+        'base64', description="Annotated image: inline base64 data URI, a /annotated URL to fetch separately, or none")
 
 class ClassifyImageRequest(BaseModel):
     image_path: Optional[str] = Field(None, description="Path to image file on server")
@@ -55,23 +141,260 @@ class ExtractTextRequest(BaseModel):
     image_base64: Optional[str] = Field(None, description="Base64 encoded image data")
     languages: str = Field('en', description="Comma-separated language codes (e.g., 'en,es,fr')")
     detail: bool = Field(True, description="Include bounding boxes and confidence scores")
+    annotation: Literal['base64', 'url', 'none'] = Field(
+        'base64', description="Annotated image: inline base64 data URI, a /annotated URL to fetch separately, or none")
 
 class DetectFacesRequest(BaseModel):
     image_path: Optional[str] = Field(None, description="Path to image file on server")
     image_base64: Optional[str] = Field(None, description="Base64 encoded image data")
     threshold: float = Field(0.5, description="Confidence threshold (0.0-1.0)")
+    annotation: Literal['base64', 'url', 'none'] = Field(
+        'base64', description="Annotated image: inline base64 data URI, a /annotated URL to fetch separately, or none")
 
 class AnalyzeSceneRequest(BaseModel):
     image_path: Optional[str] = Field(None, description="Path to image file on server")
     image_base64: Optional[str] = Field(None, description="Base64 encoded image data")
     include_text: bool = Field(True, description="Include OCR text extraction")
     include_faces: bool = Field(True, description="Include face detection")
+    annotation: Literal['base64', 'url', 'none'] = Field(
+        'base64', description="Annotated image: inline base64 data URI, a /annotated URL to fetch separately, or none")
+
+class BatchRequest(BaseModel):
+    image_path: Optional[str] = Field(None, description="Path to image file on server")
+    image_base64: Optional[str] = Field(None, description="Base64 encoded image data")
+    tasks: str = Field('objects,classification,text,faces',
+                       description="Comma-separated analyses to run (objects, classification, text, faces)")
+    object_threshold: float = Field(0.4, description="Object detection confidence threshold (0.0-1.0)")
+    top_k: int = Field(5, description="Number of top classification predictions to return")
+    languages: str = Field('en', description="Comma-separated OCR language codes (e.g., 'en,es,fr')")
+    face_threshold: float = Field(0.5, description="Face detection confidence threshold (0.0-1.0)")
+
+
+BATCH_TASKS = ('objects', 'classification', 'text', 'faces')
+CORAL_TASKS = ('objects', 'classification')
+
+
+async def run_in_pool(func, *args, **kwargs):
+    """Run a blocking decode/model/annotation call on the shared pool, off the event loop"""
+    return await run_on(app.state.pool, func, *args, **kwargs)
+
+
+async def run_on(executor, func, *args, **kwargs):
+    """Run a blocking call on a specific executor (e.g. a device's pinned worker)"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+
+def image_request_body(model: Type[BaseModel]) -> dict:
+    """
+    OpenAPI request body for endpoints accepting JSON or multipart uploads
+
+    Args:
+        model: Request model describing the JSON body
+
+    Returns:
+        openapi_extra dict documenting both content types
+    """
+    schema = model.model_json_schema()
+    form_schema = {
+        **schema,
+        "properties": {
+            "file": {"type": "string", "format": "binary", "description": "Image file upload"},
+            **schema["properties"]
+        }
+    }
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": schema},
+                "multipart/form-data": {"schema": form_schema}
+            }
+        }
+    }
+
 
+async def parse_image_request(request: Request,
+                              model: Type[BaseModel]) -> Tuple[BaseModel, Optional[UploadFile]]:
+    """
+    Parse a JSON or multipart/form-data request into its request model
+
+    Multipart requests send the raw image as a "file" field, avoiding the
+    base64 encode/decode round-trip and its 33% size overhead.
+
+    Args:
+        request: Incoming request
+        model: Request model to validate the fields against
+
+    Returns:
+        Tuple of (validated request model, uploaded file or None)
+    """
+    upload = None
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        fields = {key: value for key, value in form.items() if key != "file"}
+    else:
+        try:
+            fields = await request.json()
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON body: {str(e)}")
+
+    try:
+        return model.model_validate(fields), upload
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+
+async def resolve_image(params: BaseModel, upload: Optional[UploadFile]) -> Tuple[np.ndarray, dict]:
+    """
+    Locate the image for a request from an upload, base64 data or server path
+
+    Args:
+        params: Validated request model with image_base64/image_path fields
+        upload: Uploaded file from a multipart request
+
+    Returns:
+        Tuple of (decoded_image_array, metadata_dict)
+    """
+    if upload is not None:
+        return await decode_upload(file=upload)
+    if params.image_base64:
+        return await decode_upload(base64_data=params.image_base64)
+    if params.image_path:
+        return await run_in_pool(load_image_path, params.image_path)
+    raise HTTPException(status_code=400, detail="Either file, image_base64 or image_path must be provided")
+
+
+def load_image_path(image_path: str) -> Tuple[np.ndarray, dict]:
+    """
+    Hash and decode a server-side image file through a single read-only mmap
 
-def save_image(file: UploadFile = None, base64_data: str = None,
-               optimize: bool = True) -> tuple[Path, dict]:
+    The tools then share the decoded array instead of each re-reading the file,
+    and repeat requests for an unchanged file reuse the cached (read-only) array.
     """
-    Save uploaded or base64 image to temp file with optional optimization
+    st = os.stat(image_path)
+    key = (image_path, st.st_mtime_ns, st.st_size)
+    cached = DECODE_CACHE.get(key)
+    if cached is not None:
+        image, metadata = cached
+        return image, dict(metadata)
+
+    with open(image_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        metadata = {'image_digest': image_digest(mm)}
+        image = decode_image_bytes(mm)
+
+    image.setflags(write=False)  # Shared between requests
+    DECODE_CACHE.put(key, (image, metadata))
+    return image, dict(metadata)
+
+
+def result_cache_key(endpoint: str, params: BaseModel, image: np.ndarray, metadata: dict) -> tuple:
+    """
+    Build the result cache key from the image digest, processed size, endpoint and options
+
+    The same bytes are analysed at full size via image_path but resized to the
+    token budget when uploaded, so the decoded shape is part of the key.
+    """
+    options = params.model_dump(exclude={'image_path', 'image_base64'})
+    return (metadata['image_digest'], image.shape[:2], endpoint, tuple(sorted(options.items())))
+
+
+def get_cached_result(cache_key: tuple) -> Optional[dict]:
+    """Look up a cached response, treating one whose annotated image was evicted as a miss"""
+    cached = RESULT_CACHE.get(cache_key)
+    if cached is not None and cached.get('annotated_url'):
+        if ANNOTATED_IMAGES.get(cached['annotated_url'].rsplit('/', 1)[-1]) is None:
+            return None
+    return cached
+
+
+def all_succeeded(sections: dict) -> bool:
+    """
+    Whether every section of a multi-task response succeeded
+
+    A failed section (e.g. an NCS2 timeout) is usually transient, so responses
+    holding one are not cached - the retry after the device recovers reruns it.
+    """
+    return not any(isinstance(section, dict) and "error" in section for section in sections.values())
+
+
+async def render_annotation(mode: str, has_detections: bool, annotator, *args, **kwargs) -> dict:
+    """
+    Draw the annotated image and return its response fields for the requested mode
+
+    Args:
+        mode: "base64" (inline annotated_image), "url" (annotated_url) or "none"
+        has_detections: Whether there is anything to draw
+        annotator: annotate_detections or annotate_scene, called with args/kwargs
+
+    Returns:
+        Fields to merge into the response (empty for "none")
+    """
+    if mode == 'none':
+        return {}
+    field = 'annotated_url' if mode == 'url' else 'annotated_image'
+    if not has_detections:
+        return {field: None}
+
+    try:
+        if mode == 'url':
+            data = await run_in_pool(annotator, *args, encoding="raw", **kwargs)
+            annotation_id = uuid.uuid4().hex
+            ANNOTATED_IMAGES.put(annotation_id, data)
+            return {field: f"/annotated/{annotation_id}"}
+        return {field: await run_in_pool(annotator, *args, **kwargs)}
+    except Exception as e:
+        print(f"Warning: Could not generate annotated image: {e}")
+        return {field: None}
+
+
+def prepare_image(image_data: bytes, optimize: bool = True) -> Tuple[np.ndarray, dict]:
+    """
+    Decode image bytes and shrink them to the token budget if requested
+
+    Args:
+        image_data: Raw encoded image bytes
+        optimize: Whether to optimize image for token budget
+
+    Returns:
+        Tuple of (image_array, metadata_dict)
+    """
+    if optimize:
+        # Large JPEGs are decoded at reduced scale, since they'll be shrunk next
+        image, metadata = decode_for_tokens(image_data)
+    else:
+        image, metadata = decode_image_bytes(image_data), {}
+
+    # Optimize image if requested
+    if optimize:
+        try:
+            # Get image info - from the header when the decode was scaled, so the
+            # reported size and token reduction refer to the uploaded image
+            source_size = metadata.get('scaled_decode', {}).get('source_size')
+            info = get_image_info(image_data if source_size else image)
+            metadata['original_info'] = info
+
+            # If image exceeds token budget, resize with retry
+            if not info['within_budget']:
+                image, resize_metadata = resize_with_retry(
+                    image, source_size=tuple(source_size) if source_size else None)
+                metadata['optimization'] = resize_metadata
+                print(f"Image optimized: {resize_metadata.get('token_reduction', 'N/A')} token reduction")
+            else:
+                metadata['optimization'] = {'status': 'no_resize_needed'}
+        except Exception as e:
+            # Log warning but continue - don't fail the request
+            print(f"Warning: Image optimization failed: {e}")
+            metadata['optimization'] = {'error': str(e), 'status': 'failed'}
+
+    return image, metadata
+
+
+async def decode_upload(file: UploadFile = None, base64_data: str = None,
+                        optimize: bool = True) -> tuple[np.ndarray, dict]:
+    """
+    Decode uploaded or base64 image in memory with optional optimization
 
     Args:
         file: Uploaded file
@@ -79,14 +402,17 @@ def save_image(file: UploadFile = None, base64_data: str = None,
         optimize: Whether to optimize image for token budget (default True)
 
     Returns:
-        Tuple of (image_path, metadata_dict)
+        Tuple of (image_array, metadata_dict); metadata includes the image_digest
     """
     metadata = {}
 
     if file:
-        filepath = UPLOAD_DIR / file.filename
-        with open(filepath, 'wb') as f:
-            f.write(file.file.read())
+        # UploadFile.read() runs in a worker thread, so a large (disk-spooled)
+        # upload doesn't stall other requests
+        image_data = await file.read()
+        if len(image_data) > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail="Image too large")
+        metadata['image_digest'] = image_digest(image_data)
     elif base64_data:
         # Check for OpenWebUI placeholder tokens like [img-0]
         if base64_data.startswith('[img-') and base64_data.endswith(']'):
@@ -95,12 +421,16 @@ def save_image(file: UploadFile = None, base64_data: str = None,
                 detail=f"Image placeholder '{base64_data}' detected. OpenWebUI may not be sending actual image data to tools. This is a known limitation - images might not be passed to external tools yet."
             )
 
-        # Decode base64
-        if ',' in base64_data:
-            base64_data = base64_data.split(',')[1]
+        # Check the size before allocating the decoded copy (for bodies without Content-Length)
+        if len(base64_data) > MAX_UPLOAD_BYTES * 4 // 3 + 1024:
+            raise HTTPException(status_code=413, detail="Image too large")
 
+        # Decode base64 straight from the str, dropping any data-URI prefix with
+        # one slice instead of split() building a list of every part
         try:
-            image_data = base64.b64decode(base64_data)
+            comma = base64_data.find(',')
+            payload = base64_data[comma + 1:] if comma >= 0 else base64_data
+            image_data = base64.b64decode(payload)
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Invalid base64 data: {str(e)}")
 
@@ -111,35 +441,18 @@ def save_image(file: UploadFile = None, base64_data: str = None,
                 detail=f"Image data too small ({len(image_data)} bytes). Possible placeholder or invalid data."
             )
 
-        # Save to temp file
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.jpg', dir=UPLOAD_DIR)
-        temp_file.write(image_data)
-        temp_file.close()
-        filepath = Path(temp_file.name)
+        metadata['image_digest'] = image_digest(image_data)
     else:
         raise HTTPException(status_code=400, detail="No image provided")
 
-    # Optimize image if requested
-    if optimize:
-        try:
-            # Get image info
-            info = get_image_info(str(filepath))
-            metadata['original_info'] = info
-
-            # If image exceeds token budget, resize with retry
-            if not info['within_budget']:
-                optimized_path, resize_metadata = resize_with_retry(str(filepath))
-                metadata['optimization'] = resize_metadata
-                filepath = Path(optimized_path)
-                print(f"Image optimized: {resize_metadata.get('token_reduction', 'N/A')} token reduction")
-            else:
-                metadata['optimization'] = {'status': 'no_resize_needed'}
-        except Exception as e:
-            # Log warning but continue - don't fail the request
-            print(f"Warning: Image optimization failed: {e}")
-            metadata['optimization'] = {'error': str(e), 'status': 'failed'}
+    # Decode once; the tools work on the array without touching disk
+    try:
+        image, image_metadata = await run_in_pool(prepare_image, image_data, optimize)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    metadata.update(image_metadata)
 
-    return filepath, metadata
+    return image, metadata
 
 
 @app.get("/")
@@ -159,6 +472,8 @@ async def root():
             "/extract_text",
             "/detect_faces",
             "/analyze_scene",
+            "/batch",
+            "/annotated/{id}",
             "/health"
         ]
     }
@@ -178,205 +493,307 @@ async def health():
     }
 
 
-@app.post("/detect_objects", summary="Detect objects in image")
+@app.get("/annotated/{annotation_id}", summary="Fetch an annotated image",
+         response_class=Response)
+async def annotated_image_endpoint(annotation_id: str):
+    """Serve an annotated image returned by reference (annotation="url")"""
+    data = ANNOTATED_IMAGES.get(annotation_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Annotated image not found or expired")
+    return Response(content=data, media_type=image_media_type(data))
+
+
+@app.post("/detect_objects", summary="Detect objects in image",
+          openapi_extra=image_request_body(DetectObjectsRequest))
 async def detect_objects_endpoint(
-    request: DetectObjectsRequest = Body(...)
+    request: Request
 ):
     """
     Detect objects in an image using Google Coral TPU.
 
-    Provide either image_base64 (base64 encoded image) or image_path (server file path).
+    Provide a multipart file upload, image_base64 (base64 encoded image) or image_path (server file path).
     Returns list of detected objects with bounding boxes, labels, and confidence scores.
     """
+    params, upload = await parse_image_request(request, DetectObjectsRequest)
     try:
-        if request.image_base64:
-            img_path, metadata = save_image(base64_data=request.image_base64)
-        elif request.image_path:
-            img_path = Path(request.image_path)
-            metadata = {}
-        else:
-            raise HTTPException(status_code=400, detail="Either image_base64 or image_path must be provided")
+        image, metadata = await resolve_image(params, upload)
+
+        # Same image with the same options - skip inference entirely
+        cache_key = result_cache_key("detect_objects", params, image, metadata)
+        cached = get_cached_result(cache_key)
+        if cached is not None:
+            return ORJSONResponse({**cached, "image_metadata": metadata})
 
-        results = object_detection.detect_objects(str(img_path), threshold=request.threshold)
+        results = await run_on(CORAL_EXECUTOR, object_detection.detect_objects, image, threshold=params.threshold)
 
         # Generate annotated image with object bounding boxes
-        annotated_image = None
-        if results:
-            try:
-                annotated_image = annotate_detections(str(img_path), results, "object")
-            except Exception as e:
-                print(f"Warning: Could not generate annotated image: {e}")
+        annotation = await render_annotation(params.annotation, bool(results),
+                                             annotate_detections, image, results, "object")
 
-        return {
+        response = {
             "success": True,
             "objects": results,
             "count": len(results),
-            "annotated_image": annotated_image,
-            "image_metadata": metadata
+            **annotation
         }
+        RESULT_CACHE.put(cache_key, response)
+        return ORJSONResponse({**response, "image_metadata": metadata})
+    except HTTPException:
+        raise
     except Exception as e:
-        return JSONResponse(status_code=500, content={"success": False, "error": str(e)})
+        return ORJSONResponse(status_code=500, content={"success": False, "error": str(e)})
 
 
-@app.post("/classify_image", summary="Classify image")
+@app.post("/classify_image", summary="Classify image",
+          openapi_extra=image_request_body(ClassifyImageRequest))
 async def classify_image_endpoint(
-    request: ClassifyImageRequest = Body(...)
+    request: Request
 ):
     """
     Classify an image using Google Coral TPU.
 
-    Provide either image_base64 (base64 encoded image) or image_path (server file path).
+    Provide a multipart file upload, image_base64 (base64 encoded image) or image_path (server file path).
     Returns top K classification predictions with labels and confidence scores.
     """
+    params, upload = await parse_image_request(request, ClassifyImageRequest)
     try:
-        if request.image_base64:
-            img_path, metadata = save_image(base64_data=request.image_base64)
-        elif request.image_path:
-            img_path = Path(request.image_path)
-            metadata = {}
-        else:
-            raise HTTPException(status_code=400, detail="Either image_base64 or image_path must be provided")
-
-        results = classification.classify_image(str(img_path), top_k=request.top_k)
-        return {
+        image, metadata = await resolve_image(params, upload)
+
+        # Same image with the same options - skip inference entirely
+        cache_key = result_cache_key("classify_image", params, image, metadata)
+        cached = get_cached_result(cache_key)
+        if cached is not None:
+            return ORJSONResponse({**cached, "image_metadata": metadata})
+
+        results = await run_on(CORAL_EXECUTOR, classification.classify_image, image, top_k=params.top_k)
+        response = {
             "success": True,
-            "predictions": results,
-            "image_metadata": metadata
+            "predictions": results
         }
+        RESULT_CACHE.put(cache_key, response)
+        return ORJSONResponse({**response, "image_metadata": metadata})
+    except HTTPException:
+        raise
     except Exception as e:
-        return JSONResponse(status_code=500, content={"success": False, "error": str(e)})
+        return ORJSONResponse(status_code=500, content={"success": False, "error": str(e)})
 
 
-@app.post("/extract_text", summary="Extract text from image (OCR)")
+@app.post("/extract_text", summary="Extract text from image (OCR)",
+          openapi_extra=image_request_body(ExtractTextRequest))
 async def extract_text_endpoint(
-    request: ExtractTextRequest = Body(...)
+    request: Request
 ):
     """
     Extract text from an image using OCR (Optical Character Recognition).
 
-    Provide either image_base64 (base64 encoded image) or image_path (server file path).
+    Provide a multipart file upload, image_base64 (base64 encoded image) or image_path (server file path).
     Returns extracted text with optional bounding boxes and confidence scores.
     Supports multiple languages (comma-separated language codes).
     """
+    params, upload = await parse_image_request(request, ExtractTextRequest)
     try:
-        if request.image_base64:
-            img_path, metadata = save_image(base64_data=request.image_base64)
-        elif request.image_path:
-            img_path = Path(request.image_path)
-            metadata = {}
-        else:
-            raise HTTPException(status_code=400, detail="Either image_base64 or image_path must be provided")
+        image, metadata = await resolve_image(params, upload)
+
+        # Same image with the same options - skip inference entirely
+        cache_key = result_cache_key("extract_text", params, image, metadata)
+        cached = get_cached_result(cache_key)
+        if cached is not None:
+            return ORJSONResponse({**cached, "image_metadata": metadata})
 
-        lang_list = request.languages.split(',')
-        results = ocr.extract_text(str(img_path), languages=lang_list, detail=request.detail)
+        lang_list = params.languages.split(',')
+        results = await run_in_pool(ocr.extract_text, image, languages=lang_list, detail=params.detail)
 
         # Generate annotated image with text bounding boxes
-        annotated_image = None
-        if results and results.get('details'):
-            try:
-                annotated_image = annotate_detections(str(img_path), results['details'], "text")
-            except Exception as e:
-                print(f"Warning: Could not generate annotated image: {e}")
+        details = results.get('details') if results else None
+        annotation = await render_annotation(params.annotation, bool(details),
+                                             annotate_detections, image, details, "text")
 
-        return {
+        response = {
             "success": True,
             **results,
-            "annotated_image": annotated_image,
-            "image_metadata": metadata
+            **annotation
         }
+        RESULT_CACHE.put(cache_key, response)
+        return ORJSONResponse({**response, "image_metadata": metadata})
+    except HTTPException:
+        raise
     except Exception as e:
-        return JSONResponse(status_code=500, content={"success": False, "error": str(e)})
+        return ORJSONResponse(status_code=500, content={"success": False, "error": str(e)})
 
 
-@app.post("/detect_faces", summary="Detect faces in image")
+@app.post("/detect_faces", summary="Detect faces in image",
+          openapi_extra=image_request_body(DetectFacesRequest))
 async def detect_faces_endpoint(
-    request: DetectFacesRequest = Body(...)
+    request: Request
 ):
     """
     Detect faces in an image using Intel NCS2 (Neural Compute Stick 2).
 
-    Provide either image_base64 (base64 encoded image) or image_path (server file path).
+    Provide a multipart file upload, image_base64 (base64 encoded image) or image_path (server file path).
     Returns list of detected faces with bounding boxes and confidence scores.
     """
+    params, upload = await parse_image_request(request, DetectFacesRequest)
     try:
-        if request.image_base64:
-            img_path, metadata = save_image(base64_data=request.image_base64)
-        elif request.image_path:
-            img_path = Path(request.image_path)
-            metadata = {}
-        else:
-            raise HTTPException(status_code=400, detail="Either image_base64 or image_path must be provided")
-
-        results = face_detection.detect_faces(str(img_path), threshold=request.threshold)
+        image, metadata = await resolve_image(params, upload)
+
+        # Same image with the same options - skip inference entirely
+        cache_key = result_cache_key("detect_faces", params, image, metadata)
+        cached = get_cached_result(cache_key)
+        if cached is not None:
+            return ORJSONResponse({**cached, "image_metadata": metadata})
+
+        results = await run_on(NCS2_EXECUTOR, face_detection.detect_faces, image, threshold=params.threshold)
         if isinstance(results, dict) and "error" in results:
-            return JSONResponse(status_code=500, content={"success": False, **results})
+            return ORJSONResponse(status_code=500, content={"success": False, **results})
 
         # Generate annotated image with face bounding boxes
-        annotated_image = None
-        if results:
-            try:
-                annotated_image = annotate_detections(str(img_path), results, "face")
-            except Exception as e:
-                print(f"Warning: Could not generate annotated image: {e}")
+        annotation = await render_annotation(params.annotation, bool(results),
+                                             annotate_detections, image, results, "face")
 
-        return {
+        response = {
             "success": True,
             "faces": results,
             "count": len(results),
-            "annotated_image": annotated_image,
-            "image_metadata": metadata
+            **annotation
         }
+        RESULT_CACHE.put(cache_key, response)
+        return ORJSONResponse({**response, "image_metadata": metadata})
+    except HTTPException:
+        raise
     except Exception as e:
-        return JSONResponse(status_code=500, content={"success": False, "error": str(e)})
+        return ORJSONResponse(status_code=500, content={"success": False, "error": str(e)})
 
 
-@app.post("/analyze_scene", summary="Comprehensive scene analysis")
+@app.post("/analyze_scene", summary="Comprehensive scene analysis",
+          openapi_extra=image_request_body(AnalyzeSceneRequest))
 async def analyze_scene_endpoint(
-    request: AnalyzeSceneRequest = Body(...)
+    request: Request
 ):
     """
     Perform comprehensive scene analysis on an image.
 
-    Provide either image_base64 (base64 encoded image) or image_path (server file path).
+    Provide a multipart file upload, image_base64 (base64 encoded image) or image_path (server file path).
     Combines object detection, image classification, OCR text extraction, and face detection.
     Returns detailed analysis with human-readable summary.
     """
+    params, upload = await parse_image_request(request, AnalyzeSceneRequest)
     try:
-        if request.image_base64:
-            img_path, metadata = save_image(base64_data=request.image_base64)
-        elif request.image_path:
-            img_path = Path(request.image_path)
-            metadata = {}
-        else:
-            raise HTTPException(status_code=400, detail="Either image_base64 or image_path must be provided")
-
-        results = scene_analysis.analyze_scene(
-            str(img_path),
-            include_text=request.include_text,
-            include_faces=request.include_faces
+        image, metadata = await resolve_image(params, upload)
+
+        # Same image with the same options - skip inference entirely
+        cache_key = result_cache_key("analyze_scene", params, image, metadata)
+        cached = get_cached_result(cache_key)
+        if cached is not None:
+            return ORJSONResponse({**cached, "image_metadata": metadata})
+
+        results = await run_in_pool(
+            scene_analysis.analyze_scene,
+            image,
+            include_text=params.include_text,
+            include_faces=params.include_faces
         )
 
         # Generate annotated image with all detections
-        annotated_image = None
-        try:
-            analysis = results.get('analysis', {})
-            annotated_image = annotate_scene(
-                str(img_path),
-                objects=analysis.get('objects', {}).get('detected'),
-                faces=analysis.get('faces', {}).get('detected'),
-                text_regions=analysis.get('text', {}).get('details') if request.include_text else None
-            )
-        except Exception as e:
-            print(f"Warning: Could not generate annotated image: {e}")
+        analysis = results.get('analysis', {})
+        annotation = await render_annotation(
+            params.annotation,
+            True,
+            annotate_scene,
+            image,
+            objects=analysis.get('objects', {}).get('detected'),
+            faces=analysis.get('faces', {}).get('detected'),
+            text_regions=analysis.get('text', {}).get('details') if params.include_text else None
+        )
 
-        return {
+        response = {
             "success": True,
             **results,
-            "annotated_image": annotated_image,
-            "image_metadata": metadata
+            **annotation
+        }
+        if all_succeeded(analysis):
+            RESULT_CACHE.put(cache_key, response)
+        return ORJSONResponse({**response, "image_metadata": metadata})
+    except HTTPException:
+        raise
+    except Exception as e:
+        return ORJSONResponse(status_code=500, content={"success": False, "error": str(e)})
+
+
+@app.post("/batch", summary="Run several analyses on one image",
+          openapi_extra=image_request_body(BatchRequest))
+async def batch_endpoint(
+    request: Request
+):
+    """
+    Run any combination of analyses on a single image in one request.
+
+    Provide a multipart file upload, image_base64 (base64 encoded image) or image_path (server file path).
+    The image is uploaded and decoded once, then each requested task runs on it.
+    Returns a result per task keyed by task name (objects, classification, text, faces).
+    """
+    params, upload = await parse_image_request(request, BatchRequest)
+    tasks = [task.strip() for task in params.tasks.split(',') if task.strip()]
+    unknown = [task for task in tasks if task not in BATCH_TASKS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown task(s): {', '.join(unknown)}. Valid tasks: {', '.join(BATCH_TASKS)}"
+        )
+
+    try:
+        image, metadata = await resolve_image(params, upload)
+
+        # Same image with the same options - skip inference entirely
+        cache_key = result_cache_key("batch", params, image, metadata)
+        cached = get_cached_result(cache_key)
+        if cached is not None:
+            return ORJSONResponse({**cached, "image_metadata": metadata})
+
+        async def run_task(task: str) -> dict:
+            try:
+                if task == 'objects':
+                    objects = await run_on(CORAL_EXECUTOR, object_detection.detect_objects, image,
+                                           threshold=params.object_threshold)
+                    return {"objects": objects, "count": len(objects)}
+                elif task == 'classification':
+                    return {
+                        "predictions": await run_on(CORAL_EXECUTOR, classification.classify_image, image,
+                                                    top_k=params.top_k)
+                    }
+                elif task == 'text':
+                    return await run_in_pool(ocr.extract_text, image, languages=params.languages.split(','))
+                elif task == 'faces':
+                    faces = await run_on(NCS2_EXECUTOR, face_detection.detect_faces, image,
+                                         threshold=params.face_threshold)
+                    if isinstance(faces, dict) and "error" in faces:
+                        return faces
+                    return {"faces": faces, "count": len(faces)}
+            except Exception as e:
+                return {"error": str(e)}
+
+        async def run_coral_tasks() -> dict:
+            # Detection and classification share the Edge TPU, so run them in turn
+            return {task: await run_task(task) for task in tasks if task in CORAL_TASKS}
+
+        # Coral, NCS2 (faces) and CPU (OCR) work runs concurrently
+        other_tasks = [task for task in tasks if task not in CORAL_TASKS]
+        coral_results, *other_results = await asyncio.gather(
+            run_coral_tasks(), *(run_task(task) for task in other_tasks)
+        )
+        by_task = {**coral_results, **dict(zip(other_tasks, other_results))}
+        results = {task: by_task[task] for task in tasks}
+
+        response = {
+            "success": True,
+            "results": results
         }
+        if all_succeeded(results):
+            RESULT_CACHE.put(cache_key, response)
+        return ORJSONResponse({**response, "image_metadata": metadata})
+    except HTTPException:
+        raise
     except Exception as e:
-        return JSONResponse(status_code=500, content={"success": False, "error": str(e)})
+        return ORJSONResponse(status_code=500, content={"success": False, "error": str(e)})
 
 
 if __name__ == "__main__":
@@ -78,9 +78,10 @@ try:
 except Exception as e:
     print(f"✗ scene_analysis: {e}")
 
-# Test 4: Check tool status
+# Test 4: Load models and check tool status
 print("\n[4] Checking tool status...")
 try:
+    object_detection.warmup()
     status = object_detection.get_status()
     if status.get('available'):
         print(f"✓ Object Detection: {status.get('device')}")
@@ -90,6 +91,7 @@ except Exception as e:
     print(f"✗ Object Detection error: {e}")
 
 try:
+    classification.warmup()
     status = classification.get_status()
     if status.get('available'):
         print(f"✓ Classification: {status.get('device')}")
@@ -99,6 +101,7 @@ except Exception as e:
     print(f"✗ Classification error: {e}")
 
 try:
+    ocr.warmup()
     status = ocr.get_status()
     if status.get('available'):
         print(f"✓ OCR: {status.get('engine')}")
@@ -108,6 +111,7 @@ except Exception as e:
     print(f"✗ OCR error: {e}")
 
 try:
+    face_detection.warmup()
     status = face_detection.get_status()
     if status.get('available'):
         print(f"✓ Face Detection: {status.get('device')}")
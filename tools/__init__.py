@@ -1,3 +1,16 @@
 """
 Vision tools for object detection, classification, OCR, and scene analysis
 """
+import os
+
+# OCR backend: "easyocr" (default) or "rapidocr" (RapidOCR on OpenVINO, faster on CPU)
+OCR_ENGINE = os.environ.get("OCR_ENGINE", "easyocr").lower()
+
+
+def load_ocr_engine():
+    """Return the OCR module selected by OCR_ENGINE (both expose the same functions)"""
+    if OCR_ENGINE == "rapidocr":
+        from . import ocr_rapid
+        return ocr_rapid
+    from . import ocr
+    return ocr
@@ -2,12 +2,16 @@
 Image classification using Google Coral USB Accelerator
 """
 import cv2
+import threading
 import numpy as np
 from pathlib import Path
 from typing import List, Dict
 from pycoral.adapters import common, classify
 from pycoral.utils.edgetpu import make_interpreter
 
+from utils.image_loader import ImageInput, load_image
+from utils.buffer_pool import thread_buffer
+
 # Model paths
 MODELS_DIR = Path(__file__).parent.parent / "models" / "coral"
 MODEL_FILE = MODELS_DIR / "mobilenet_v2_1.0_224_quant_edgetpu.tflite"
@@ -16,22 +20,27 @@ LABELS_FILE = MODELS_DIR / "imagenet_labels.txt"
 # Global interpreter (loaded once)
 _interpreter = None
 _labels = None
+_input_size = None  # (width, height), read once from the model
+_load_error = None  # Set by warmup() if the model failed to load
+_lock = threading.Lock()  # Requests run on a worker pool; the interpreter isn't thread-safe
 
 
 def load_labels(path):
-    """Load labels from text file"""
+    """Load labels from text file (as a tuple - read-only and fast to index)"""
     with open(path, 'r') as f:
-        return [line.strip() for line in f.readlines()]
+        return tuple(line.strip() for line in f)
 
 
 def initialize():
     """Initialize the Coral TPU interpreter"""
-    global _interpreter, _labels
+    global _interpreter, _labels, _input_size
 
     if _interpreter is None:
         print(f"Loading classification model from {MODEL_FILE}")
         _interpreter = make_interpreter(str(MODEL_FILE))
         _interpreter.allocate_tensors()
+        _, height, width, _ = _interpreter.get_input_details()[0]['shape']
+        _input_size = (int(width), int(height))
         print("Classification model loaded successfully")
 
     if _labels is None:
@@ -39,12 +48,12 @@ def initialize():
         print(f"Loaded {len(_labels)} classification labels")
 
 
-def classify_image(image_path: str, top_k: int = 5) -> List[Dict]:
+def classify_image(image: ImageInput, top_k: int = 5) -> List[Dict]:
     """
     Classify an image using Google Coral
 
     Args:
-        image_path: Path to image file
+        image: Path to image file, encoded image bytes, or BGR array
         top_k: Number of top predictions to return
 
     Returns:
@@ -53,48 +62,63 @@ def classify_image(image_path: str, top_k: int = 5) -> List[Dict]:
     initialize()
 
     # Load and preprocess image
-    image = cv2.imread(str(image_path))
-    if image is None:
-        raise ValueError(f"Could not load image: {image_path}")
+    image = load_image(image)
 
-    # Get input size
-    _, height, width, _ = _interpreter.get_input_details()[0]['shape']
+    width, height = _input_size
 
-    # Resize image to model input size
-    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-    image_resized = cv2.resize(image_rgb, (width, height))
+    # Resize to model input size into a reused buffer (skipped if already that size)
+    if image.shape[:2] == (height, width):
+        image_resized = image
+    else:
+        image_resized = cv2.resize(image, (width, height),
+                                   dst=thread_buffer("classification.resized", (height, width, 3)))
 
-    # Run inference
-    common.set_input(_interpreter, image_resized)
-    _interpreter.invoke()
+    # Run inference (fill/invoke/read-out must not interleave)
+    with _lock:
+        # Convert BGR->RGB straight into the interpreter's uint8 input tensor,
+        # skipping the extra copy set_input would make
+        input_tensor = common.input_tensor(_interpreter)
+        cv2.cvtColor(image_resized, cv2.COLOR_BGR2RGB, dst=input_tensor)
+        del input_tensor  # invoke() refuses to run while a view of the tensor is alive
+        _interpreter.invoke()
 
-    # Get results
-    classes = classify.get_classes(_interpreter, top_k=top_k)
+        # Get results
+        classes = classify.get_classes(_interpreter, top_k=top_k)
 
     # Format results
-    results = []
-    for c in classes:
-        result = {
-            "label": _labels[c.id] if c.id < len(_labels) else f"Unknown ({c.id})",
+    labels_count = len(_labels)
+    return [
+        {
+            "label": _labels[c.id] if c.id < labels_count else f"Unknown ({c.id})",
             "confidence": float(c.score)
         }
-        results.append(result)
+        for c in classes
+    ]
 
-    return results
 
+def warmup() -> bool:
+    """Load the model up front so requests and status checks never pay for it"""
+    global _load_error
 
-def get_status() -> Dict:
-    """Get status of classification system"""
     try:
         initialize()
-        return {
-            "available": True,
-            "model": MODEL_FILE.name,
-            "device": "Google Coral USB Accelerator",
-            "labels_count": len(_labels) if _labels else 0
-        }
+        _load_error = None
     except Exception as e:
+        _load_error = str(e)
+        print(f"Warning: Could not load classification model: {e}")
+    return _interpreter is not None
+
+
+def get_status() -> Dict:
+    """Get status of classification system (no model loading or device I/O)"""
+    if _interpreter is None:
         return {
             "available": False,
-            "error": str(e)
+            "error": _load_error or "Model not loaded"
         }
+    return {
+        "available": True,
+        "model": MODEL_FILE.name,
+        "device": "Google Coral USB Accelerator",
+        "labels_count": len(_labels) if _labels else 0
+    }
@@ -2,12 +2,16 @@
 Object detection using Google Coral USB Accelerator
 """
 import cv2
+import threading
 import numpy as np
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
 from pycoral.adapters import common, detect
 from pycoral.utils.edgetpu import make_interpreter
 
+from utils.image_loader import ImageInput, load_image
+from utils.buffer_pool import thread_buffer
+
 # Model paths
 MODELS_DIR = Path(__file__).parent.parent / "models" / "coral"
 MODEL_FILE = MODELS_DIR / "ssd_mobilenet_v2_coco_quant_postprocess_edgetpu.tflite"
@@ -16,6 +20,16 @@ LABELS_FILE = MODELS_DIR / "coco_labels.txt"
 # Global interpreter (loaded once)
 _interpreter = None
 _labels = None
+_input_size = None  # (width, height), read once from the model
+_load_error = None  # Set by warmup() if the model failed to load
+_lock = threading.Lock()  # Requests run on a worker pool; the interpreter isn't thread-safe
+
+# Detections are kept as a structured array (one row per object) and only
+# turned into dicts when returned, so filtering and box math stay vectorized
+DET_DTYPE = np.dtype([
+    ('label_id', 'i4'), ('score', 'f4'),
+    ('ymin', 'f4'), ('xmin', 'f4'), ('ymax', 'f4'), ('xmax', 'f4')
+])
 
 
 def load_labels(path):
@@ -40,12 +54,14 @@ def load_labels(path):
 
 def initialize():
     """Initialize the Coral TPU interpreter"""
-    global _interpreter, _labels
+    global _interpreter, _labels, _input_size
 
     if _interpreter is None:
         print(f"Loading object detection model from {MODEL_FILE}")
         _interpreter = make_interpreter(str(MODEL_FILE))
         _interpreter.allocate_tensors()
+        _, height, width, _ = _interpreter.get_input_details()[0]['shape']
+        _input_size = (int(width), int(height))
         print("Object detection model loaded successfully")
 
     if _labels is None:
@@ -53,13 +69,16 @@ def initialize():
         print(f"Loaded {len(_labels)} object labels")
 
 
-def detect_objects(image_path: str, threshold: float = 0.4) -> List[Dict]:
+def detect_objects(image: ImageInput, threshold: float = 0.4,
+                   nms_iou: Optional[float] = 0.5) -> List[Dict]:
     """
     Detect objects in an image using Google Coral
 
     Args:
-        image_path: Path to image file
+        image: Path to image file, encoded image bytes, or BGR array
         threshold: Confidence threshold (0.0-1.0)
+        nms_iou: Drop boxes overlapping a higher-scoring box of the same
+            label by more than this IoU (None disables)
 
     Returns:
         List of detected objects with bounding boxes and confidence scores
@@ -67,54 +86,124 @@ def detect_objects(image_path: str, threshold: float = 0.4) -> List[Dict]:
     initialize()
 
     # Load and preprocess image
-    image = cv2.imread(str(image_path))
-    if image is None:
-        raise ValueError(f"Could not load image: {image_path}")
-
-    # Get input size
-    _, height, width, _ = _interpreter.get_input_details()[0]['shape']
-
-    # Resize image to model input size
-    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-    image_resized = cv2.resize(image_rgb, (width, height))
-
-    # Run inference
-    common.set_input(_interpreter, image_resized)
-    _interpreter.invoke()
-
-    # Get results
-    objects = detect.get_objects(_interpreter, threshold)
-
-    # Format results
-    results = []
-    for obj in objects:
-        result = {
-            "label": _labels.get(obj.id, obj.id),
-            "confidence": float(obj.score),
+    image = load_image(image)
+
+    width, height = _input_size
+
+    # Resize to model input size first, so only the small image is color-converted
+    # (frames already at the input size go straight to the color conversion)
+    if image.shape[:2] == (height, width):
+        image_resized = image
+    else:
+        image_resized = cv2.resize(image, (width, height),
+                                   dst=thread_buffer("object_detection.resized", (height, width, 3)))
+
+    # Run inference (fill/invoke/read-out must not interleave)
+    with _lock:
+        # Convert BGR->RGB straight into the interpreter's uint8 input tensor,
+        # skipping the extra copy set_input would make
+        input_tensor = common.input_tensor(_interpreter)
+        cv2.cvtColor(image_resized, cv2.COLOR_BGR2RGB, dst=input_tensor)
+        del input_tensor  # invoke() refuses to run while a view of the tensor is alive
+        _interpreter.invoke()
+
+        # Get results
+        objects = detect.get_objects(_interpreter, threshold)
+
+    detections = np.array(
+        [(obj.id, obj.score, obj.bbox.ymin, obj.bbox.xmin, obj.bbox.ymax, obj.bbox.xmax) for obj in objects],
+        dtype=DET_DTYPE
+    )
+    if nms_iou is not None:
+        detections = nms(detections, nms_iou)
+
+    return to_dicts(detections)
+
+
+def nms(detections: np.ndarray, iou_threshold: float = 0.5) -> np.ndarray:
+    """
+    Per-label non-maximum suppression on a DET_DTYPE array
+
+    All pairwise IoUs are computed in one broadcast; only the greedy keep
+    pass loops, over at most the model's ~100 boxes.
+
+    Args:
+        detections: Structured array of detections
+        iou_threshold: Overlap above which the lower-scoring box is dropped
+
+    Returns:
+        Surviving detections, highest score first
+    """
+    detections = detections[np.argsort(-detections['score'], kind='stable')]
+    x0, y0, x1, y1 = (detections[key] for key in ('xmin', 'ymin', 'xmax', 'ymax'))
+    areas = np.clip(x1 - x0, 0, None) * np.clip(y1 - y0, 0, None)
+
+    inter_w = np.clip(np.minimum(x1[:, None], x1) - np.maximum(x0[:, None], x0), 0, None)
+    inter_h = np.clip(np.minimum(y1[:, None], y1) - np.maximum(y0[:, None], y0), 0, None)
+    inter = inter_w * inter_h
+    iou = inter / np.maximum(areas[:, None] + areas - inter, 1e-6)
+    overlaps = (iou > iou_threshold) & (detections['label_id'][:, None] == detections['label_id'])
+
+    keep = np.ones(len(detections), dtype=bool)
+    for i in range(len(detections)):
+        if keep[i]:
+            keep[i + 1:] &= ~overlaps[i, i + 1:]
+    return detections[keep]
+
+
+def to_dicts(detections: np.ndarray) -> List[Dict]:
+    """
+    Convert a DET_DTYPE array into the JSON result format
+
+    Args:
+        detections: Structured array of detections
+
+    Returns:
+        List of detected objects with label, confidence and bounding box
+    """
+    label_ids = detections['label_id'].tolist()
+    scores = detections['score'].tolist()
+    boxes = zip(detections['ymin'].tolist(), detections['xmin'].tolist(),
+                detections['ymax'].tolist(), detections['xmax'].tolist())
+
+    return [
+        {
+            "label": _labels.get(label_id, label_id),
+            "confidence": score,
             "bounding_box": {
-                "ymin": float(obj.bbox.ymin),
-                "xmin": float(obj.bbox.xmin),
-                "ymax": float(obj.bbox.ymax),
-                "xmax": float(obj.bbox.xmax)
+                "ymin": ymin,
+                "xmin": xmin,
+                "ymax": ymax,
+                "xmax": xmax
             }
         }
-        results.append(result)
+        for label_id, score, (ymin, xmin, ymax, xmax) in zip(label_ids, scores, boxes)
+    ]
 
-    return results
 
+def warmup() -> bool:
+    """Load the model up front so requests and status checks never pay for it"""
+    global _load_error
 
-def get_status() -> Dict:
-    """Get status of object detection system"""
     try:
         initialize()
-        return {
-            "available": True,
-            "model": MODEL_FILE.name,
-            "device": "Google Coral USB Accelerator",
-            "labels_count": len(_labels) if _labels else 0
-        }
+        _load_error = None
     except Exception as e:
+        _load_error = str(e)
+        print(f"Warning: Could not load object detection model: {e}")
+    return _interpreter is not None
+
+
+def get_status() -> Dict:
+    """Get status of object detection system (no model loading or device I/O)"""
+    if _interpreter is None:
         return {
             "available": False,
-            "error": str(e)
+            "error": _load_error or "Model not loaded"
         }
+    return {
+        "available": True,
+        "model": MODEL_FILE.name,
+        "device": "Google Coral USB Accelerator",
+        "labels_count": len(_labels) if _labels else 0
+    }
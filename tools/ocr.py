@@ -3,12 +3,20 @@ OCR (Optical Character Recognition) text extraction
 Using EasyOCR for robust multi-language support
 """
 import cv2
+import threading
 from pathlib import Path
 from typing import List, Dict
-import easyocr
+
+from utils.image_loader import ImageInput, load_image
+
+# Laplacian variance (256x256 grayscale) below which an image is assumed to
+# contain no text - smooth scenery, sky, blurred backgrounds
+TEXT_VARIANCE_THRESHOLD = 150.0
 
 # Global OCR reader (loaded once)
 _reader = None
+_load_error = None  # Set by warmup() if the model failed to load
+_lock = threading.Lock()  # Requests run on a worker pool; the reader isn't thread-safe
 
 
 def initialize(languages=['en']):
@@ -16,17 +24,41 @@ def initialize(languages=['en']):
     global _reader
 
     if _reader is None:
+        # Imported here so the shared helpers (used by tools.ocr_rapid) don't
+        # pull in EasyOCR and torch when OCR_ENGINE=rapidocr
+        import easyocr
+
         print(f"Loading EasyOCR for languages: {languages}")
         _reader = easyocr.Reader(languages, gpu=False)  # CPU mode
         print("EasyOCR loaded successfully")
 
 
-def extract_text(image_path: str, languages=['en'], detail=True) -> Dict:
+def likely_has_text(image: ImageInput, threshold: float = TEXT_VARIANCE_THRESHOLD) -> bool:
+    """
+    Cheap pre-check for whether OCR is worth running
+
+    Text produces dense sharp edges, so a low Laplacian variance on a small
+    grayscale thumbnail means there is almost certainly nothing to read.
+
+    Args:
+        image: Path to image file, encoded image bytes, or BGR array
+        threshold: Minimum Laplacian variance to treat the image as text-bearing
+
+    Returns:
+        True if the image has enough fine detail to possibly contain text
+    """
+    image = load_image(image)
+    thumbnail = cv2.resize(image, (256, 256), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(thumbnail, cv2.COLOR_BGR2GRAY)
+    return cv2.Laplacian(gray, cv2.CV_64F).var() >= threshold
+
+
+def extract_text(image: ImageInput, languages=['en'], detail=True) -> Dict:
     """
     Extract text from an image using OCR
 
     Args:
-        image_path: Path to image file
+        image: Path to image file, encoded image bytes, or BGR array
         languages: List of language codes (e.g., ['en', 'es', 'fr'])
         detail: If True, return bounding boxes and confidence scores
 
@@ -36,13 +68,17 @@ def extract_text(image_path: str, languages=['en'], detail=True) -> Dict:
     initialize(languages)
 
     # Read image
-    image = cv2.imread(str(image_path))
-    if image is None:
-        raise ValueError(f"Could not load image: {image_path}")
+    image = load_image(image)
 
     # Perform OCR
-    results = _reader.readtext(image)
+    with _lock:
+        results = _reader.readtext(image)
 
+    return _format_results(results, detail)
+
+
+def _format_results(results: List, detail: bool) -> Dict:
+    """Turn [box, text, confidence] OCR output into the response dict"""
     if not detail:
         # Return just the text
         text = ' '.join([result[1] for result in results])
@@ -75,17 +111,28 @@ def extract_text(image_path: str, languages=['en'], detail=True) -> Dict:
     }
 
 
-def get_status() -> Dict:
-    """Get status of OCR system"""
+def warmup() -> bool:
+    """Load the model up front so requests and status checks never pay for it"""
+    global _load_error
+
     try:
         initialize()
-        return {
-            "available": True,
-            "engine": "EasyOCR",
-            "supported_languages": ['en', 'es', 'fr', 'de', 'it', 'pt', 'zh', 'ja', 'ko']  # subset
-        }
+        _load_error = None
     except Exception as e:
+        _load_error = str(e)
+        print(f"Warning: Could not load OCR model: {e}")
+    return _reader is not None
+
+
+def get_status() -> Dict:
+    """Get status of OCR system (no model loading or device I/O)"""
+    if _reader is None:
         return {
             "available": False,
-            "error": str(e)
+            "error": _load_error or "Model not loaded"
         }
+    return {
+        "available": True,
+        "engine": "EasyOCR",
+        "supported_languages": ['en', 'es', 'fr', 'de', 'it', 'pt', 'zh', 'ja', 'ko']  # subset
+    }
@@ -0,0 +1,77 @@
+"""
+OCR (Optical Character Recognition) text extraction
+Using RapidOCR (PP-OCR models on OpenVINO) - a faster CPU alternative to EasyOCR
+Selected with OCR_ENGINE=rapidocr
+"""
+import threading
+from typing import Dict
+from rapidocr_openvino import RapidOCR
+
+from utils.image_loader import ImageInput, load_image
+from .ocr import likely_has_text, _format_results  # Shared with the EasyOCR engine (no easyocr import)
+
+# Global OCR engine (loaded once)
+_engine = None
+_load_error = None  # Set by warmup() if the model failed to load
+_lock = threading.Lock()  # Requests run on a worker pool; the engine isn't thread-safe
+
+
+def initialize(languages=['en']):
+    """Initialize RapidOCR (PP-OCR models cover Latin text regardless of languages)"""
+    global _engine
+
+    if _engine is None:
+        print("Loading RapidOCR (OpenVINO)")
+        _engine = RapidOCR()
+        print("RapidOCR loaded successfully")
+
+
+def extract_text(image: ImageInput, languages=['en'], detail=True) -> Dict:
+    """
+    Extract text from an image using OCR
+
+    Args:
+        image: Path to image file, encoded image bytes, or BGR array
+        languages: Accepted for compatibility with the EasyOCR engine (unused)
+        detail: If True, return bounding boxes and confidence scores
+
+    Returns:
+        Dictionary with extracted text and optional details (same shape as tools.ocr)
+    """
+    initialize(languages)
+
+    # Read image
+    image = load_image(image)
+
+    # Perform OCR - returns [[box, text, score], ...] or None when nothing is found
+    with _lock:
+        results, _ = _engine(image)
+
+    return _format_results(results or [], detail)
+
+
+def warmup() -> bool:
+    """Load the model up front so requests and status checks never pay for it"""
+    global _load_error
+
+    try:
+        initialize()
+        _load_error = None
+    except Exception as e:
+        _load_error = str(e)
+        print(f"Warning: Could not load OCR model: {e}")
+    return _engine is not None
+
+
+def get_status() -> Dict:
+    """Get status of OCR system (no model loading or device I/O)"""
+    if _engine is None:
+        return {
+            "available": False,
+            "error": _load_error or "Model not loaded"
+        }
+    return {
+        "available": True,
+        "engine": "RapidOCR-OpenVINO",
+        "supported_languages": ['en', 'zh']
+    }
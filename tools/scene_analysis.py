@@ -1,21 +1,31 @@
 """
 Comprehensive scene analysis combining multiple AI tools
 """
-from typing import Dict
+from typing import Dict, List, Optional
 from pathlib import Path
 
 from .object_detection import detect_objects
 from .classification import classify_image
-from .ocr import extract_text
+from . import load_ocr_engine
 from .face_detection import detect_faces
+from utils.image_loader import ImageInput, load_image
+from utils.device_executor import CORAL_EXECUTOR, NCS2_EXECUTOR
 
+# OCR backend selected by OCR_ENGINE
+_ocr = load_ocr_engine()
 
-def analyze_scene(image_path: str, include_text: bool = True, include_faces: bool = True) -> Dict:
+# Detections this confident stand in for the classifier (see _classification_from_objects).
+# Kept above the 0.3 detection threshold so a scene with only weak detections
+# still gets the ImageNet classifier
+DERIVED_CLASSIFICATION_THRESHOLD = 0.5
+
+
+def analyze_scene(image: ImageInput, include_text: bool = True, include_faces: bool = True) -> Dict:
     """
     Perform comprehensive scene analysis on an image
 
     Args:
-        image_path: Path to image file
+        image: Path to image file, encoded image bytes, or BGR array
         include_text: Whether to perform OCR
         include_faces: Whether to detect faces
 
@@ -23,92 +33,165 @@ def analyze_scene(image_path: str, include_text: bool = True, include_faces: boo
         Dictionary with comprehensive scene analysis
     """
     results = {
-        "image": str(image_path),
+        "image": str(image) if isinstance(image, (str, Path)) else None,
         "analysis": {}
     }
 
-    # Object detection (Coral)
+    # Decode once up front; every sub-tool then works on the same array
+    image = load_image(image)
+
+    # Coral and NCS2 work goes to the device executors while OCR runs on the
+    # calling thread (a worker of the server's shared pool), so all three
+    # overlap. Detection and classification share the Coral, so they stay sequential.
+    coral = CORAL_EXECUTOR.submit(_coral_analysis, image)
+    faces = NCS2_EXECUTOR.submit(_face_analysis, image) if include_faces else None
+    text = _text_analysis(image) if include_text else None
+
+    results["analysis"].update(coral.result())
+    if text is not None:
+        results["analysis"]["text"] = text
+    if faces is not None:
+        results["analysis"]["faces"] = faces.result()
+
+    # Generate human-readable summary
+    results["summary"] = generate_summary(results["analysis"])
+
+    return results
+
+
+def _coral_analysis(image: ImageInput) -> Dict:
+    """Object detection and classification (Coral)"""
+    analysis = {}
+    objects = []
+
     try:
-        objects = detect_objects(image_path, threshold=0.3)
-        results["analysis"]["objects"] = {
+        objects = detect_objects(image, threshold=0.3)
+        analysis["objects"] = {
             "count": len(objects),
             "detected": objects
         }
     except Exception as e:
-        results["analysis"]["objects"] = {"error": str(e)}
+        analysis["objects"] = {"error": str(e)}
+
+    # Confident detections already say what the scene is - only fall back to
+    # a second TPU pass through the classifier when there are none
+    top_predictions = _classification_from_objects(objects, top_k=3)
+    if top_predictions:
+        analysis["classification"] = {
+            "top_predictions": top_predictions,
+            "source": "object_detection"
+        }
+        return analysis
 
-    # Image classification (Coral)
     try:
-        classifications = classify_image(image_path, top_k=3)
-        results["analysis"]["classification"] = {
-            "top_predictions": classifications
+        classifications = classify_image(image, top_k=3)
+        analysis["classification"] = {
+            "top_predictions": classifications,
+            "source": "classifier"
         }
     except Exception as e:
-        results["analysis"]["classification"] = {"error": str(e)}
-
-    # OCR text extraction
-    if include_text:
-        try:
-            text_data = extract_text(image_path, detail=False)
-            results["analysis"]["text"] = text_data
-        except Exception as e:
-            results["analysis"]["text"] = {"error": str(e)}
-
-    # Face detection (Intel NCS2)
-    if include_faces:
-        try:
-            faces = detect_faces(image_path, threshold=0.5)
-            if isinstance(faces, dict) and "error" in faces:
-                results["analysis"]["faces"] = faces
-            else:
-                results["analysis"]["faces"] = {
-                    "count": len(faces),
-                    "detected": faces
-                }
-        except Exception as e:
-            results["analysis"]["faces"] = {"error": str(e)}
+        analysis["classification"] = {"error": str(e)}
 
-    # Generate human-readable summary
-    results["summary"] = generate_summary(results["analysis"])
+    return analysis
 
-    return results
+
+def _classification_from_objects(objects: List[Dict], top_k: int = 3) -> List[Dict]:
+    """
+    Derive scene labels from detections instead of running the classifier
+
+    Labels are ranked by confidence x box area summed over their detections;
+    each keeps the confidence of its best detection.
+
+    Returns:
+        Up to top_k predictions, or [] if no detection is confident enough
+    """
+    scores = {}
+    confidences = {}
+    for obj in objects:
+        confidence = obj["confidence"]
+        if confidence < DERIVED_CLASSIFICATION_THRESHOLD:
+            continue
+        label = obj["label"]
+        box = obj["bounding_box"]
+        area = max(box["xmax"] - box["xmin"], 0) * max(box["ymax"] - box["ymin"], 0)
+        scores[label] = scores.get(label, 0.0) + confidence * area
+        confidences[label] = max(confidences.get(label, 0.0), confidence)
+
+    ranked = sorted(scores, key=scores.get, reverse=True)[:top_k]
+    return [{"label": label, "confidence": confidences[label]} for label in ranked]
+
+
+def _text_analysis(image: ImageInput) -> Dict:
+    """OCR text extraction (CPU), skipped for images with no text-like detail"""
+    try:
+        if not _ocr.likely_has_text(image):
+            return {"text": "", "words_found": 0}
+        return _ocr.extract_text(image, detail=False)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def _face_analysis(image: ImageInput) -> Dict:
+    """Face detection (Intel NCS2)"""
+    try:
+        faces = detect_faces(image, threshold=0.5)
+        if isinstance(faces, dict) and "error" in faces:
+            return faces
+        return {
+            "count": len(faces),
+            "detected": faces
+        }
+    except Exception as e:
+        return {"error": str(e)}
 
 
 def generate_summary(analysis: Dict) -> str:
     """Generate a human-readable summary of the scene"""
-    parts = []
-
-    # Classification
-    if "classification" in analysis and "top_predictions" in analysis["classification"]:
-        top_class = analysis["classification"]["top_predictions"][0]
-        parts.append(f"This appears to be {top_class['label']} ({top_class['confidence']:.1%} confident)")
-
-    # Objects
-    if "objects" in analysis and "detected" in analysis["objects"]:
-        obj_count = analysis["objects"]["count"]
-        if obj_count > 0:
-            # Count unique objects
-            obj_labels = [obj["label"] for obj in analysis["objects"]["detected"]]
-            unique_objects = list(set(obj_labels))
-            if len(unique_objects) <= 3:
-                parts.append(f"I can see: {', '.join(unique_objects)}")
-            else:
-                parts.append(f"I can see {obj_count} objects including: {', '.join(unique_objects[:3])}, and more")
-
-    # Faces
-    if "faces" in analysis and "count" in analysis["faces"]:
-        face_count = analysis["faces"]["count"]
-        if face_count > 0:
-            parts.append(f"{face_count} {'face' if face_count == 1 else 'faces'} detected")
-
-    # Text
-    if "text" in analysis and "text" in analysis["text"]:
-        text_content = analysis["text"]["text"].strip()
-        if text_content:
-            word_count = analysis["text"].get("words_found", 0)
-            if len(text_content) > 100:
-                parts.append(f"Contains text ({word_count} words): {text_content[:100]}...")
-            else:
-                parts.append(f"Contains text: {text_content}")
-
-    return ". ".join(parts) if parts else "Unable to analyze scene"
+    chunks = (
+        chunk for chunk in (
+            _classification_summary(analysis),
+            _objects_summary(analysis),
+            _faces_summary(analysis),
+            _text_summary(analysis)
+        ) if chunk
+    )
+    return ". ".join(chunks) or "Unable to analyze scene"
+
+
+def _classification_summary(analysis: Dict) -> Optional[str]:
+    """Top scene label"""
+    predictions = analysis.get("classification", {}).get("top_predictions")
+    if not predictions:
+        return None
+    top_class = predictions[0]
+    return f"This appears to be {top_class['label']} ({top_class['confidence']:.1%} confident)"
+
+
+def _objects_summary(analysis: Dict) -> Optional[str]:
+    """Unique object labels, in detection order"""
+    objects = analysis.get("objects", {})
+    if not objects.get("detected"):
+        return None
+    unique_objects = list(dict.fromkeys(obj["label"] for obj in objects["detected"]))
+    if len(unique_objects) <= 3:
+        return f"I can see: {', '.join(unique_objects)}"
+    return f"I can see {objects['count']} objects including: {', '.join(unique_objects[:3])}, and more"
+
+
+def _faces_summary(analysis: Dict) -> Optional[str]:
+    """Face count"""
+    face_count = analysis.get("faces", {}).get("count", 0)
+    if face_count <= 0:
+        return None
+    return f"{face_count} {'face' if face_count == 1 else 'faces'} detected"
+
+
+def _text_summary(analysis: Dict) -> Optional[str]:
+    """Extracted text, truncated to 100 characters"""
+    text_content = analysis.get("text", {}).get("text", "").strip()
+    if not text_content:
+        return None
+    if len(text_content) > 100:
+        word_count = analysis["text"].get("words_found", 0)
+        return f"Contains text ({word_count} words): {text_content[:100]}..."
+    return f"Contains text: {text_content}"
@@ -1,6 +1,12 @@
 """Utility modules for vision tool server"""
+from .image_loader import (
+    load_image,
+    decode_image_bytes
+)
 from .image_optimizer import (
     resize_image_for_tokens,
+    resize_array_for_tokens,
+    decode_for_tokens,
     resize_with_retry,
     get_image_info,
     estimate_image_tokens,
@@ -8,15 +14,37 @@ from .image_optimizer import (
 )
 from .image_annotator import (
     annotate_detections,
-    annotate_scene
+    annotate_scene,
+    image_media_type
+)
+from .buffer_pool import thread_buffer
+from .device_executor import (
+    device_executor,
+    CORAL_EXECUTOR,
+    NCS2_EXECUTOR
+)
+from .result_cache import (
+    ResultCache,
+    image_digest
 )
 
 __all__ = [
+    'load_image',
+    'decode_image_bytes',
     'resize_image_for_tokens',
+    'resize_array_for_tokens',
+    'decode_for_tokens',
     'resize_with_retry',
     'get_image_info',
     'estimate_image_tokens',
     'calculate_target_dimensions',
     'annotate_detections',
-    'annotate_scene'
+    'annotate_scene',
+    'image_media_type',
+    'thread_buffer',
+    'device_executor',
+    'CORAL_EXECUTOR',
+    'NCS2_EXECUTOR',
+    'ResultCache',
+    'image_digest'
 ]
@@ -0,0 +1,32 @@
+"""
+Per-thread scratch buffers for model preprocessing
+Model inputs have a fixed shape, so the same arrays can be reused for every request
+"""
+import threading
+import numpy as np
+from typing import Tuple
+
+_local = threading.local()
+
+
+def thread_buffer(name: str, shape: Tuple[int, ...], dtype=np.uint8) -> np.ndarray:
+    """
+    Return a preallocated array owned by the calling thread
+
+    Each worker thread gets its own copy, so buffers are never shared between
+    concurrent requests. A buffer is only reallocated if the requested shape
+    or dtype changes.
+
+    Args:
+        name: Buffer name, unique per use site (e.g. "object_detection.resized")
+        shape: Required array shape
+        dtype: Required array dtype
+
+    Returns:
+        Uninitialized array of the requested shape and dtype
+    """
+    buffers = _local.__dict__.setdefault('buffers', {})
+    buffer = buffers.get(name)
+    if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+        buffer = buffers[name] = np.empty(shape, dtype=dtype)
+    return buffer
@@ -0,0 +1,45 @@
+"""
+Dedicated executors for the accelerators
+Each device's model calls run on a single worker thread pinned to its own CPU core
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+# Cores the device workers are pinned to (skipped if the host doesn't have them)
+CORAL_CPU = 2
+NCS2_CPU = 3
+
+
+def _pin_to_cpu(cpu: Optional[int]):
+    """Pin the calling thread to one core, keeping preprocessing and USB transfers cache-local"""
+    if cpu is None or not hasattr(os, 'sched_setaffinity'):
+        return
+    try:
+        if cpu in os.sched_getaffinity(0):
+            os.sched_setaffinity(0, {cpu})  # pid 0 = this thread on Linux
+    except OSError as e:
+        print(f"Warning: Could not pin worker thread to CPU {cpu}: {e}")
+
+
+def device_executor(name: str, cpu: Optional[int] = None) -> ThreadPoolExecutor:
+    """
+    Create a single-worker executor for one accelerator
+
+    The device only runs one inference at a time, so one worker loses nothing
+    and stops callers bouncing the model between cores.
+
+    Args:
+        name: Thread name prefix (e.g. "coral")
+        cpu: Core to pin the worker to, or None to leave it unpinned
+
+    Returns:
+        Executor with one (optionally pinned) worker thread
+    """
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix=name,
+                              initializer=_pin_to_cpu, initargs=(cpu,))
+
+
+# Coral (object detection + classification) and NCS2 (faces) inference
+CORAL_EXECUTOR = device_executor("coral", CORAL_CPU)
+NCS2_EXECUTOR = device_executor("ncs2", NCS2_CPU)
@@ -1,32 +1,50 @@
 """
 Image annotation utilities for drawing bounding boxes and labels
 """
+import os
 import cv2
-import base64
 import numpy as np
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Union
+
+try:
+    import pybase64 as base64  # SIMD-accelerated drop-in for the stdlib module
+except ImportError:
+    import base64
+
+from .image_loader import ImageInput, load_image
+
+# Codec for annotated images: "webp" (default, small and fast), "jpeg" or "png".
+# Images with few colors (diagrams, screenshots) are always sent as PNG.
+ANNOTATION_CODEC = os.environ.get("ANNOTATION_CODEC", "webp").lower()
+
+# Below this many distinct colors (sampled) PNG is both smaller and lossless
+PNG_MAX_COLORS = 256
 
 
 def annotate_detections(
-    image_path: str,
+    image: ImageInput,
     detections: List[Dict],
-    detection_type: str = "object"
-) -> str:
+    detection_type: str = "object",
+    encoding: str = "base64",
+    codec: Optional[str] = None
+) -> Union[str, bytes]:
     """
-    Draw bounding boxes and labels on image and return as base64 string
+    Draw bounding boxes and labels on image and return it encoded
 
     Args:
-        image_path: Path to the original image
+        image: Path to the original image, encoded bytes, or BGR array
         detections: List of detection dictionaries with bbox and label info
         detection_type: Type of detection ("object", "face", "text")
+        encoding: "base64" for a data URI, "raw" for the encoded bytes
+        codec: "webp", "jpeg" or "png" (defaults to ANNOTATION_CODEC)
 
     Returns:
-        Base64-encoded PNG image with annotations
+        Annotated image as a base64 data URI or raw bytes
     """
-    # Read image
-    img = cv2.imread(image_path)
-    if img is None:
-        raise ValueError(f"Could not read image: {image_path}")
+    # Read image (copy arrays - drawing happens in place)
+    img = load_image(image)
+    if img is image:
+        img = img.copy()
 
     # Define colors for different types (BGR format)
     colors = {
@@ -39,86 +57,37 @@ def annotate_detections(
     color = colors.get(detection_type, (0, 255, 0))
 
     # Draw each detection
-    for det in detections:
-        bbox = det.get('bounding_box', {})
+    _draw_detections(img, detections, color)
 
-        # Handle different bbox formats
-        if 'xmin' in bbox:  # Format: {xmin, ymin, xmax, ymax}
-            x1, y1 = int(bbox['xmin']), int(bbox['ymin'])
-            x2, y2 = int(bbox['xmax']), int(bbox['ymax'])
-        elif 'top_left' in bbox:  # Format: {top_left, bottom_right}
-            x1, y1 = int(bbox['top_left'][0]), int(bbox['top_left'][1])
-            x2, y2 = int(bbox['bottom_right'][0]), int(bbox['bottom_right'][1])
-        else:
-            continue  # Skip if bbox format unknown
-
-        # Draw rectangle
-        cv2.rectangle(img, (x1, y1), (x2, y2), color, 2)
-
-        # Prepare label text
-        label_parts = []
-        if 'label' in det:
-            label_parts.append(det['label'])
-        if 'text' in det:
-            label_parts.append(det['text'])
-        if 'confidence' in det:
-            conf = det['confidence']
-            label_parts.append(f"{conf*100:.1f}%")
-
-        label = " ".join(label_parts)
-
-        # Draw label background
-        if label:
-            (text_width, text_height), baseline = cv2.getTextSize(
-                label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1
-            )
-            cv2.rectangle(
-                img,
-                (x1, y1 - text_height - baseline - 5),
-                (x1 + text_width, y1),
-                color,
-                -1  # Filled
-            )
-            # Draw label text
-            cv2.putText(
-                img,
-                label,
-                (x1, y1 - baseline - 2),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.5,
-                (255, 255, 255),  # White text
-                1
-            )
-
-    # Encode to PNG and then to base64
-    _, buffer = cv2.imencode('.png', img)
-    img_base64 = base64.b64encode(buffer).decode('utf-8')
-
-    return img_base64
+    return _encode_image(img, encoding, codec)
 
 
 def annotate_scene(
-    image_path: str,
+    image: ImageInput,
     objects: Optional[List[Dict]] = None,
     faces: Optional[List[Dict]] = None,
-    text_regions: Optional[List[Dict]] = None
-) -> str:
+    text_regions: Optional[List[Dict]] = None,
+    encoding: str = "base64",
+    codec: Optional[str] = None
+) -> Union[str, bytes]:
     """
     Draw multiple types of annotations on a single image
 
     Args:
-        image_path: Path to the original image
+        image: Path to the original image, encoded bytes, or BGR array
         objects: List of object detections
         faces: List of face detections
         text_regions: List of text detections (OCR results)
+        encoding: "base64" for a data URI, "raw" for the encoded bytes
+        codec: "webp", "jpeg" or "png" (defaults to ANNOTATION_CODEC)
 
     Returns:
-        Base64-encoded PNG image with all annotations
+        Image with all annotations as a base64 data URI or raw bytes
     """
-    # Read image
-    img = cv2.imread(image_path)
-    if img is None:
-        raise ValueError(f"Could not read image: {image_path}")
+    # Read image (copy arrays - drawing happens in place)
+    img = load_image(image)
+    if img is image:
+        img = img.copy()
 
     # Define colors (BGR format)
     object_color = (0, 255, 0)      # Green
@@ -127,77 +96,133 @@ def annotate_scene(
 
     # Draw objects
     if objects:
-        for obj in objects:
-            _draw_detection(img, obj, object_color, "object")
+        _draw_detections(img, objects, object_color, max_text=20)
 
     # Draw faces
     if faces:
-        for face in faces:
-            _draw_detection(img, face, face_color, "face")
+        _draw_detections(img, faces, face_color, max_text=20)
 
     # Draw text regions
     if text_regions:
-        for text_det in text_regions:
-            _draw_detection(img, text_det, text_color, "text")
+        _draw_detections(img, text_regions, text_color, max_text=20)
+
+    return _encode_image(img, encoding, codec)
+
+
+# Encoder settings per codec. PNG level 1 is several times faster than the
+# default 3 for a slightly larger file; JPEG skips the extra Huffman pass.
+CODEC_PARAMS = {
+    "webp": ('.webp', [cv2.IMWRITE_WEBP_QUALITY, 90]),
+    "jpeg": ('.jpg', [cv2.IMWRITE_JPEG_QUALITY, 85, cv2.IMWRITE_JPEG_OPTIMIZE, 0]),
+    "png": ('.png', [cv2.IMWRITE_PNG_COMPRESSION, 1]),
+}
+
+if ANNOTATION_CODEC not in CODEC_PARAMS:
+    print(f"Warning: Unknown ANNOTATION_CODEC '{ANNOTATION_CODEC}' "
+          f"(expected one of {', '.join(CODEC_PARAMS)}), using webp")
+    ANNOTATION_CODEC = "webp"
 
-    # Encode to PNG and then to base64
-    _, buffer = cv2.imencode('.png', img)
-    img_base64 = base64.b64encode(buffer).decode('utf-8')
 
-    return img_base64
+def image_media_type(data: bytes) -> str:
+    """Media type of an encoded annotated image, from its signature"""
+    if data[:8] == b'\x89PNG\r\n\x1a\n':
+        return "image/png"
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return "image/webp"
+    return "image/jpeg"
 
 
-def _draw_detection(img: np.ndarray, det: Dict, color: Tuple[int, int, int], det_type: str):
-    """Helper function to draw a single detection"""
-    bbox = det.get('bounding_box', {})
+def _few_colors(img: np.ndarray) -> bool:
+    """Whether the image has a small palette (checked on every 8th pixel)"""
+    sample = np.ascontiguousarray(img[::8, ::8]).reshape(-1, 3).astype(np.uint32)
+    packed = (sample[:, 0] << 16) | (sample[:, 1] << 8) | sample[:, 2]
+    return len(np.unique(packed)) < PNG_MAX_COLORS
 
-    # Handle different bbox formats
-    if 'xmin' in bbox:
-        x1, y1 = int(bbox['xmin']), int(bbox['ymin'])
-        x2, y2 = int(bbox['xmax']), int(bbox['ymax'])
-    elif 'top_left' in bbox:
-        x1, y1 = int(bbox['top_left'][0]), int(bbox['top_left'][1])
-        x2, y2 = int(bbox['bottom_right'][0]), int(bbox['bottom_right'][1])
-    else:
+
+def _encode_image(img: np.ndarray, encoding: str, codec: Optional[str]) -> Union[str, bytes]:
+    """Encode an annotated image, as raw bytes or a base64 data URI"""
+    codec = codec or ("png" if _few_colors(img) else ANNOTATION_CODEC)
+    ext, params = CODEC_PARAMS[codec]
+    _, buffer = cv2.imencode(ext, img, params)
+    if encoding == "raw":
+        return buffer.tobytes()
+    return f"data:image/{codec};base64,{base64.b64encode(buffer).decode('ascii')}"
+
+
+def _detection_boxes(detections: List[Dict]) -> Tuple[np.ndarray, List[Dict]]:
+    """
+    Gather bounding boxes from either format into one array
+
+    Handles {xmin, ymin, xmax, ymax} (objects, faces) and {top_left,
+    bottom_right} (OCR) boxes; detections in any other format are dropped.
+
+    Returns:
+        (N, 4) int32 array of x1, y1, x2, y2 and the matching detections
+    """
+    coords = []
+    kept = []
+    for det in detections:
+        bbox = det.get('bounding_box', {})
+        if 'xmin' in bbox:
+            coords.append((bbox['xmin'], bbox['ymin'], bbox['xmax'], bbox['ymax']))
+        elif 'top_left' in bbox:
+            coords.append((bbox['top_left'][0], bbox['top_left'][1],
+                           bbox['bottom_right'][0], bbox['bottom_right'][1]))
+        else:
+            continue
+        kept.append(det)
+
+    boxes = np.array(coords, dtype=np.float32).reshape(-1, 4).astype(np.int32)
+    return boxes, kept
+
+
+def _draw_detections(img: np.ndarray, detections: List[Dict], color: Tuple[int, int, int],
+                     max_text: Optional[int] = None):
+    """Draw boxes and labels for a list of detections, truncating OCR text to max_text chars"""
+    boxes, detections = _detection_boxes(detections)
+    if not detections:
         return
 
-    # Draw rectangle
-    cv2.rectangle(img, (x1, y1), (x2, y2), color, 2)
-
-    # Prepare label
-    label_parts = []
-    if 'label' in det:
-        label_parts.append(det['label'])
-    if 'text' in det:
-        # Truncate long text
-        text = det['text']
-        if len(text) > 20:
-            text = text[:17] + "..."
-        label_parts.append(text)
-    if 'confidence' in det:
-        conf = det['confidence']
-        label_parts.append(f"{conf*100:.1f}%")
-
-    label = " ".join(label_parts)
-
-    # Draw label
-    if label:
-        (text_width, text_height), baseline = cv2.getTextSize(
-            label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1
-        )
-        cv2.rectangle(
-            img,
-            (x1, y1 - text_height - baseline - 5),
-            (x1 + text_width, y1),
-            color,
-            -1
-        )
-        cv2.putText(
-            img,
-            label,
-            (x1, y1 - baseline - 2),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.5,
-            (255, 255, 255),
-            1
-        )
+    # Draw every outline in one call (same pixels as per-box cv2.rectangle);
+    # corners go top-left, top-right, bottom-right, bottom-left
+    corners = np.stack([boxes[:, [0, 1]], boxes[:, [2, 1]], boxes[:, [2, 3]], boxes[:, [0, 3]]], axis=1)
+    cv2.polylines(img, list(corners.reshape(-1, 4, 1, 2)), True, color, 2)
+
+    # Labels vary per detection, so they are still drawn one at a time
+    for (x1, y1, x2, y2), det in zip(boxes.tolist(), detections):
+        # Prepare label
+        label_parts = []
+        if 'label' in det:
+            label_parts.append(det['label'])
+        if 'text' in det:
+            text = det['text']
+            if max_text is not None and len(text) > max_text:
+                text = text[:max_text - 3] + "..."  # Truncate long text
+            label_parts.append(text)
+        if 'confidence' in det:
+            conf = det['confidence']
+            label_parts.append(f"{conf*100:.1f}%")
+
+        label = " ".join(label_parts)
+
+        # Draw label background and text
+        if label:
+            (text_width, text_height), baseline = cv2.getTextSize(
+                label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1
+            )
+            cv2.rectangle(
+                img,
+                (x1, y1 - text_height - baseline - 5),
+                (x1 + text_width, y1),
+                color,
+                -1  # Filled
+            )
+            cv2.putText(
+                img,
+                label,
+                (x1, y1 - baseline - 2),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.5,
+                (255, 255, 255),  # White text
+                1
+            )
@@ -0,0 +1,47 @@
+"""
+Image loading helpers shared by the tools
+Images can be passed around as a file path, raw encoded bytes or a decoded array
+"""
+import cv2
+import numpy as np
+from pathlib import Path
+from typing import Union
+
+ImageInput = Union[str, Path, bytes, np.ndarray]
+
+
+def decode_image_bytes(data: bytes) -> np.ndarray:
+    """
+    Decode encoded image bytes (JPEG, PNG, ...) in memory
+
+    Args:
+        data: Raw encoded image bytes
+
+    Returns:
+        Decoded BGR image array
+    """
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Could not decode image data")
+    return image
+
+
+def load_image(image: ImageInput) -> np.ndarray:
+    """
+    Load an image from a path, encoded bytes or an already-decoded array
+
+    Args:
+        image: Path to image file, encoded image bytes, or BGR array
+
+    Returns:
+        BGR image array (arrays are returned as-is, not copied)
+    """
+    if isinstance(image, np.ndarray):
+        return image
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return decode_image_bytes(image)
+
+    loaded = cv2.imread(str(image))
+    if loaded is None:
+        raise ValueError(f"Could not load image: {image}")
+    return loaded
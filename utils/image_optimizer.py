@@ -2,11 +2,17 @@
 Image optimization for LLM token management
 Resizes images to prevent token overflow with smart estimation
 """
+import io
 import cv2
 import math
+import functools
+import numpy as np
 from pathlib import Path
 from typing import Tuple, Optional
 import tempfile
+from PIL import Image
+
+from .image_loader import ImageInput, load_image, decode_image_bytes
 
 
 # Token estimation constants
@@ -18,6 +24,7 @@ MAX_TOKENS_TARGET = 3500   # Leave room for text context (target 3.5k of 4k)
 MIN_IMAGE_SIZE = 224       # Minimum size for vision models
 
 
+@functools.lru_cache(maxsize=1024)
 def estimate_image_tokens(width: int, height: int) -> int:
     """
     Estimate token count for an image based on dimensions
@@ -49,13 +56,17 @@ def estimate_image_tokens(width: int, height: int) -> int:
     return estimated_tokens
 
 
+@functools.lru_cache(maxsize=256)
 def calculate_target_dimensions(current_width: int, current_height: int,
                                 target_tokens: int) -> Tuple[int, int]:
     """
     Calculate optimal image dimensions to fit within token budget
 
-    Uses geometric scaling to maintain aspect ratio while reducing tokens.
-    Formula: new_area / old_area = target_tokens / current_tokens
+    Token cost is a step function of the 512px tile grid, so the largest size
+    that fits is found directly: each scale that puts an edge on a tile
+    boundary is tried, largest first, and the first whose 16px-snapped size
+    is within budget wins. The result always meets the target (unless even a
+    single tile exceeds it), so callers never need to shrink again.
 
     Args:
         current_width: Current image width
@@ -70,13 +81,19 @@ def calculate_target_dimensions(current_width: int, current_height: int,
     if current_tokens <= target_tokens:
         return current_width, current_height
 
-    # Calculate scaling factor based on token ratio
-    # Since tokens scale roughly with area: scale = sqrt(target/current)
-    scale_factor = math.sqrt(target_tokens / current_tokens)
+    # Scales landing the width or height exactly on k tiles, largest first
+    scales = sorted(
+        {512 * k / current_width for k in range(1, math.ceil(current_width / 512) + 1)} |
+        {512 * k / current_height for k in range(1, math.ceil(current_height / 512) + 1)},
+        reverse=True
+    )
 
-    # Apply scaling
-    new_width = int(current_width * scale_factor)
-    new_height = int(current_height * scale_factor)
+    for scale in scales:
+        # Snapping down to the 16px grid can only lower the tile count
+        new_width = int(current_width * scale) // 16 * 16
+        new_height = int(current_height * scale) // 16 * 16
+        if scale < 1 and estimate_image_tokens(new_width, new_height) <= target_tokens:
+            break
 
     # Ensure minimum size
     if new_width < MIN_IMAGE_SIZE or new_height < MIN_IMAGE_SIZE:
@@ -89,32 +106,67 @@ def calculate_target_dimensions(current_width: int, current_height: int,
             new_height = MIN_IMAGE_SIZE
             new_width = int(MIN_IMAGE_SIZE * aspect_ratio)
 
-    # Round to multiples of 16 for better model compatibility
-    new_width = (new_width // 16) * 16
-    new_height = (new_height // 16) * 16
+        # Round to multiples of 16 for better model compatibility
+        new_width = (new_width // 16) * 16
+        new_height = (new_height // 16) * 16
 
     return max(new_width, MIN_IMAGE_SIZE), max(new_height, MIN_IMAGE_SIZE)
 
 
-def resize_image_for_tokens(image_path: str, max_tokens: int = MAX_TOKENS_TARGET,
-                            output_path: Optional[str] = None) -> Tuple[str, dict]:
+def decode_for_tokens(image_data: bytes,
+                      max_tokens: int = MAX_TOKENS_TARGET) -> Tuple[np.ndarray, dict]:
     """
-    Resize an image to fit within token budget
+    Decode image bytes, scaling large JPEGs down during decode
+
+    libjpeg can scale by 1/2, 1/4 or 1/8 inside the IDCT (Pillow's draft mode),
+    skipping most of the decode work for photos that are about to be shrunk to
+    the token budget anyway. The scale is chosen so the decoded image still
+    covers the target size, so the following resize loses nothing.
 
     Args:
-        image_path: Path to input image
-        max_tokens: Maximum token budget (default 3500)
-        output_path: Optional output path (creates temp file if None)
+        image_data: Raw encoded image bytes
+        max_tokens: Token budget the image will be resized to
 
     Returns:
-        Tuple of (resized_image_path, metadata_dict)
+        Tuple of (BGR image array, metadata_dict describing any scaled decode)
     """
-    # Read image
-    image = cv2.imread(image_path)
-    if image is None:
-        raise ValueError(f"Could not load image: {image_path}")
+    try:
+        with Image.open(io.BytesIO(image_data)) as img:
+            width, height = img.size
+            # cv2 applies EXIF rotation, Pillow doesn't - only take this path
+            # for upright images so results match the regular decode
+            if (img.format == 'JPEG' and img.getexif().get(0x0112, 1) == 1
+                    and estimate_image_tokens(width, height) > max_tokens):
+                img.draft('RGB', calculate_target_dimensions(width, height, max_tokens))
+                if img.size != (width, height):
+                    image = cv2.cvtColor(np.asarray(img.convert('RGB')), cv2.COLOR_RGB2BGR)
+                    return image, {
+                        "scaled_decode": {
+                            "source_size": [width, height],
+                            "decoded_size": list(img.size)
+                        }
+                    }
+    except (OSError, ValueError, Image.DecompressionBombError):
+        pass  # Let the regular decoder handle (or reject) it
+
+    return decode_image_bytes(image_data), {}
+
+
+def resize_array_for_tokens(image: np.ndarray, max_tokens: int = MAX_TOKENS_TARGET,
+                            source_size: Optional[Tuple[int, int]] = None) -> Tuple[np.ndarray, dict]:
+    """
+    Resize a decoded image in memory to fit within token budget
 
-    original_height, original_width = image.shape[:2]
+    Args:
+        image: BGR image array
+        max_tokens: Maximum token budget (default 3500)
+        source_size: (width, height) before a scaled decode (see decode_for_tokens);
+            sizes and token reduction are then reported against it
+
+    Returns:
+        Tuple of (resized_image, metadata_dict)
+    """
+    original_width, original_height = source_size or image.shape[1::-1]
     original_tokens = estimate_image_tokens(original_width, original_height)
 
     metadata = {
@@ -126,16 +178,52 @@ def resize_image_for_tokens(image_path: str, max_tokens: int = MAX_TOKENS_TARGET
     # Check if resizing needed
     if original_tokens <= max_tokens:
         metadata["message"] = "Image within token budget, no resize needed"
-        return image_path, metadata
+        return image, metadata
 
     # Calculate target dimensions
     new_width, new_height = calculate_target_dimensions(
         original_width, original_height, max_tokens
     )
 
-    # Resize image
-    resized_image = cv2.resize(image, (new_width, new_height),
-                               interpolation=cv2.INTER_AREA)
+    # Resize image (a scaled decode may already have landed on the target)
+    if image.shape[1::-1] == (new_width, new_height):
+        resized_image = image
+    else:
+        resized_image = cv2.resize(image, (new_width, new_height),
+                                   interpolation=cv2.INTER_AREA)
+
+    # Update metadata (ensure all values are JSON-serializable)
+    new_tokens = estimate_image_tokens(new_width, new_height)
+    metadata.update({
+        "resized": True,
+        "new_size": [new_width, new_height],  # List instead of tuple for JSON
+        "new_tokens_estimated": int(new_tokens),
+        "scale_factor": float(new_width / original_width),
+        "token_reduction": f"{((original_tokens - new_tokens) / original_tokens * 100):.1f}%"
+    })
+
+    return resized_image, metadata
+
+
+def resize_image_for_tokens(image_path: str, max_tokens: int = MAX_TOKENS_TARGET,
+                            output_path: Optional[str] = None) -> Tuple[str, dict]:
+    """
+    Resize an image to fit within token budget
+
+    Args:
+        image_path: Path to input image
+        max_tokens: Maximum token budget (default 3500)
+        output_path: Optional output path (creates temp file if None)
+
+    Returns:
+        Tuple of (resized_image_path, metadata_dict)
+    """
+    # Read image
+    image = load_image(image_path)
+
+    resized_image, metadata = resize_array_for_tokens(image, max_tokens)
+    if not metadata["resized"]:
+        return image_path, metadata
 
     # Save resized image
     if output_path is None:
@@ -149,22 +237,13 @@ def resize_image_for_tokens(image_path: str, max_tokens: int = MAX_TOKENS_TARGET
         temp_file.close()
 
     cv2.imwrite(output_path, resized_image)
-
-    # Update metadata (ensure all values are JSON-serializable)
-    new_tokens = estimate_image_tokens(new_width, new_height)
-    metadata.update({
-        "resized": True,
-        "new_size": [new_width, new_height],  # List instead of tuple for JSON
-        "new_tokens_estimated": int(new_tokens),
-        "scale_factor": float(new_width / original_width),
-        "token_reduction": f"{((original_tokens - new_tokens) / original_tokens * 100):.1f}%",
-        "output_path": str(output_path)  # Convert Path to string
-    })
+    metadata["output_path"] = str(output_path)  # Convert Path to string
 
     return str(output_path), metadata
 
 
-def resize_with_retry(image_path: str, max_attempts: int = 3) -> Tuple[str, dict]:
+def resize_with_retry(image: ImageInput, max_attempts: int = 3,
+                      source_size: Optional[Tuple[int, int]] = None) -> Tuple[ImageInput, dict]:
     """
     Resize image with exponential backoff if token budget exceeded
 
@@ -174,12 +253,19 @@ def resize_with_retry(image_path: str, max_attempts: int = 3) -> Tuple[str, dict
     - Attempt 3: 2000 tokens (50% of 4k context)
 
     Args:
-        image_path: Path to input image
+        image: Path to input image, or a BGR array to resize in memory
         max_attempts: Maximum number of resize attempts
+        source_size: (width, height) of an array before a scaled decode
 
     Returns:
-        Tuple of (resized_image_path, metadata_dict)
+        Tuple of (resized_image_path or resized array, metadata_dict)
     """
+    # Arrays are resized in memory; paths are written to a resized copy
+    if isinstance(image, np.ndarray):
+        resize = functools.partial(resize_array_for_tokens, source_size=source_size)
+    else:
+        resize = resize_image_for_tokens
+
     # Token targets for each attempt (exponential backoff)
     token_targets = [
         3500,  # 87.5% of 4k
@@ -193,9 +279,7 @@ def resize_with_retry(image_path: str, max_attempts: int = 3) -> Tuple[str, dict
         target = token_targets[min(attempt, len(token_targets) - 1)]
 
         try:
-            resized_path, metadata = resize_image_for_tokens(
-                image_path, max_tokens=target
-            )
+            resized_path, metadata = resize(image, max_tokens=target)
 
             metadata["attempt"] = attempt + 1
             metadata["target_tokens"] = target
@@ -244,13 +328,31 @@ def resize_with_retry(image_path: str, max_attempts: int = 3) -> Tuple[str, dict
     return resized_path, {"retry_history": all_metadata}
 
 
-def get_image_info(image_path: str) -> dict:
-    """Get image dimensions and estimated token count"""
-    image = cv2.imread(image_path)
-    if image is None:
-        raise ValueError(f"Could not load image: {image_path}")
+def _header_size(image: ImageInput) -> Tuple[int, int]:
+    """
+    Read (width, height) from the file header without decoding pixel data
+
+    Sizes match cv2's decode, which applies EXIF rotation: orientations 5-8
+    (90/270 degree turns) swap width and height.
+    """
+    source = io.BytesIO(image) if isinstance(image, (bytes, bytearray, memoryview)) else str(image)
+    with Image.open(source) as img:
+        width, height = img.size
+        if img.format == 'JPEG' and img.getexif().get(0x0112, 1) in (5, 6, 7, 8):
+            width, height = height, width
+    return width, height
+
+
+def get_image_info(image: ImageInput) -> dict:
+    """Get image dimensions and estimated token count (files and bytes are never decoded)"""
+    if isinstance(image, np.ndarray):
+        height, width = image.shape[:2]
+    else:
+        try:
+            width, height = _header_size(image)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            height, width = load_image(image).shape[:2]  # Formats Pillow can't read
 
-    height, width = image.shape[:2]
     tokens = estimate_image_tokens(width, height)
 
     return {
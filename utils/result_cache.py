@@ -0,0 +1,67 @@
+"""
+Content-addressed cache for analysis results
+Re-submitting the same image skips inference entirely
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+def image_digest(data: bytes) -> str:
+    """
+    Hash image bytes for use as a cache key
+
+    BLAKE2b runs at memory speed, so hashing is negligible next to inference.
+
+    Args:
+        data: Raw image bytes
+
+    Returns:
+        Hex digest of the image content
+    """
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class ResultCache:
+    """Thread-safe LRU cache of analysis results, bounded by entry count and optionally bytes"""
+
+    def __init__(self, maxsize: int = 128, max_bytes: Optional[int] = None,
+                 sizeof: Optional[Callable[[Any], int]] = None):
+        """
+        Args:
+            maxsize: Maximum number of entries
+            max_bytes: Maximum total size of the entries (None for no limit)
+            sizeof: Size of a value in bytes, required with max_bytes
+        """
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entry when full"""
+        size = self._sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return  # Would evict everything else and still not fit
+
+        with self._lock:
+            self._total_bytes += size - self._sizes.get(key, 0)
+            self._sizes[key] = size
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize or (
+                    self.max_bytes is not None and self._total_bytes > self.max_bytes):
+                evicted, _ = self._entries.popitem(last=False)
+                self._total_bytes -= self._sizes.pop(evicted)